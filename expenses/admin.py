@@ -4,4 +4,4 @@ from .models import *
 admin.site.register(Salary)
 admin.site.register(Expense)
 admin.site.register(Installment)
-
+admin.site.register(Category)
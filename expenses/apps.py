@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ExpensesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'expenses'
+
+    def ready(self):
+        from django.conf import settings
+        if getattr(settings, 'SERVER_TIMING', False):
+            from django.db.backends.signals import connection_created
+            from .timing import install_query_recorder
+            connection_created.connect(install_query_recorder)
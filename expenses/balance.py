@@ -0,0 +1,278 @@
+import asyncio
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F, Q, Value, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+from dateutil.relativedelta import relativedelta
+
+from .cache import cached_for_user, acached_for_user
+from .models import (
+    Category, CategoryRollup, Expense, Installment, FixedExpense, FixedExpenseOccurrence, Salary, MonthlyLedger,
+    month_bounds, months_between, period_q
+)
+
+CENT = Decimal('0.01')
+UNCATEGORIZED = 'Sem categoria'
+
+# Nomes fixos em vez de locale.setlocale, que é global ao processo e não é seguro entre requisições.
+MONTH_NAMES = (
+    'Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho',
+    'Julho', 'Agosto', 'Setembro', 'Outubro', 'Novembro', 'Dezembro',
+)
+
+
+def month_name(month):
+    return MONTH_NAMES[month - 1]
+
+
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+def monthly_balance_rows(user_id, year, month):
+    first_day, next_month = month_bounds(year, month)
+    expenses_this_month = Expense.objects.filter(
+        user_id=user_id,
+        is_installment=False,
+        purchase_date__gte=first_day,
+        purchase_date__lt=next_month
+    ).values(kind=Value('variable'), ref=F('pk'), label=F('description'), value=F('total_amount'), day=F('purchase_date'))
+    installments_this_month = Installment.objects.filter(
+        user_id=user_id,
+        month=month, 
+        year=year
+    ).values(kind=Value('variable'), ref=F('expense_id'), label=F('expense__description'), value=F('installment_amount'), day=F('due_date')).order_by()
+    fixed_expenses_this_month = FixedExpense.objects.filter(
+        user_id=user_id
+    ).active_between(first_day, next_month).with_month_amount(year, month).values(
+        kind=Value('fixed'), ref=F('pk'), label=F('description'), value=F('month_amount'), day=F('start_date')
+    )
+
+    return expenses_this_month.union(installments_this_month, fixed_expenses_this_month, all=True).order_by('day')
+
+
+def category_names(user_id):
+    return Category.objects.filter(user_id=user_id).values_list('pk', 'name')
+
+
+def category_totals(user_id, condition):
+    return CategoryRollup.objects.filter(condition, user_id=user_id).values('category_id').annotate(
+        total=Sum('total')
+    ).order_by().values_list('category_id', 'total')
+
+
+def fresh_category_totals(ledger):
+    # Mês recém-calculado: os totais acabaram de ser gravados no banco principal e a réplica
+    # ainda não os tem; usa os que ficaram na memória.
+    rollups = getattr(ledger, 'category_rollups', None)
+    if rollups is None:
+        return None
+    return [(rollup.category_id, rollup.total) for rollup in rollups]
+
+
+def build_category_breakdown(total_expenses, totals, names):
+    names = dict(names)
+    per_category = defaultdict(Decimal)
+    for category_id, total in totals:
+        per_category[category_id] += total
+
+    categories = [
+        {'category': category_id, 'name': names[category_id], 'total': total}
+        for category_id, total in per_category.items() if total and category_id in names
+    ]
+    categories.sort(key=lambda row: (-row['total'], row['name']))
+    # O que não está em nenhuma categoria sai por diferença com o total do resumo mensal.
+    uncategorized = total_expenses - sum((row['total'] for row in categories), Decimal('0'))
+    if uncategorized:
+        categories.append({'category': None, 'name': UNCATEGORIZED, 'total': uncategorized})
+    for row in categories:
+        row['share'] = (row['total'] * 100 / total_expenses).quantize(Decimal('0.1')) if total_expenses else Decimal('0')
+    return categories
+
+
+def build_monthly_balance(ledger, rows, year, month, categories):
+    installments = []
+    fixed_occurrences = []
+    for row in rows:
+        if row['kind'] == 'fixed':
+            row['day'] += relativedelta(year=year, month=month)
+            fixed_occurrences.append(row)
+        else:
+            installments.append(row)
+    fixed_occurrences.sort(key=lambda row: row['day'])
+
+    return {
+        'salary': ledger.salary,
+        'total_installments': ledger.variable_total + ledger.installment_total,
+        'total_fixed_expenses': ledger.fixed_total,
+        'total_expenses': ledger.total_expenses,
+        'balance': ledger.balance,
+        'installments': installments,
+        'fixed_expenses_occurrences': fixed_occurrences,
+        'categories': categories,
+    }
+
+
+def compute_monthly_balance(user_id, year, month):
+    ledger = MonthlyLedger.for_month(user_id, year, month)
+    totals = fresh_category_totals(ledger)
+    if totals is None:
+        totals = category_totals(user_id, Q(year=year, month=month))
+    categories = build_category_breakdown(ledger.total_expenses, totals, category_names(user_id))
+    return build_monthly_balance(ledger, monthly_balance_rows(user_id, year, month), year, month, categories)
+
+
+async def acompute_monthly_balance(user_id, year, month):
+    ledger, rows, names = await asyncio.gather(
+        MonthlyLedger.afor_month(user_id, year, month),
+        _alist(monthly_balance_rows(user_id, year, month)),
+        _alist(category_names(user_id)),
+    )
+    totals = fresh_category_totals(ledger)
+    if totals is None:
+        totals = await _alist(category_totals(user_id, Q(year=year, month=month)))
+    categories = build_category_breakdown(ledger.total_expenses, totals, names)
+    return build_monthly_balance(ledger, rows, year, month, categories)
+
+
+def get_monthly_balance(user_id, year, month):
+    return cached_for_user(user_id, 'balance', (year, month), lambda: compute_monthly_balance(user_id, year, month))
+
+
+async def aget_monthly_balance(user_id, year, month):
+    return await acached_for_user(
+        user_id, 'balance', (year, month), lambda: acompute_monthly_balance(user_id, year, month)
+    )
+
+
+def compute_category_breakdown(user_id, first_month, months):
+    first_day = first_month.replace(day=1)
+    last_day = first_day + relativedelta(months=months - 1)
+    ledgers = {
+        (ledger.year, ledger.month): ledger
+        for ledger in MonthlyLedger.objects.filter(period_q(first_day, last_day), user_id=user_id)
+    }
+    totals = []
+    fresh = Q()
+    for index in range(months):
+        period = first_day + relativedelta(months=index)
+        key = (period.year, period.month)
+        if key not in ledgers:
+            # Calcular o resumo do mês também grava os totais por categoria dele.
+            ledgers[key] = MonthlyLedger.for_month(user_id, *key)
+            rollups = fresh_category_totals(ledgers[key])
+            if rollups is not None:
+                totals.extend(rollups)
+                fresh |= Q(year=period.year, month=period.month)
+
+    condition = period_q(first_day, last_day)
+    if fresh:
+        condition &= ~fresh
+    totals.extend(category_totals(user_id, condition))
+    total_expenses = sum((ledger.total_expenses for ledger in ledgers.values()), Decimal('0'))
+    return {
+        'total_expenses': total_expenses,
+        'categories': build_category_breakdown(total_expenses, totals, category_names(user_id)),
+    }
+
+
+def get_category_breakdown(user_id, first_month, months):
+    return cached_for_user(
+        user_id, 'categories', (first_month.year, first_month.month, months),
+        lambda: compute_category_breakdown(user_id, first_month, months)
+    )
+
+
+def overview_querysets(user_id, first_day, end_day):
+    last_day = end_day - relativedelta(days=1)
+    return (
+        Salary.objects.filter(
+            user_id=user_id, year__gte=first_day.year, year__lte=last_day.year
+        ).values_list('year', 'amount'),
+        Expense.objects.filter(
+            user_id=user_id, is_installment=False, purchase_date__gte=first_day, purchase_date__lt=end_day
+        ).values(year=ExtractYear('purchase_date'), month=ExtractMonth('purchase_date')).annotate(
+            total=Sum('total_amount')
+        ).order_by().values_list('year', 'month', 'total'),
+        Installment.objects.filter(period_q(first_day, last_day), user_id=user_id).values(
+            'year', 'month'
+        ).annotate(total=Sum('installment_amount')).order_by().values_list('year', 'month', 'total'),
+        FixedExpense.objects.filter(user_id=user_id).active_between(first_day, end_day).only(
+            'monthly_amount', 'start_date', 'end_date'
+        ),
+        FixedExpenseOccurrence.objects.filter(period_q(first_day, last_day), user_id=user_id).values_list(
+            'fixed_expense_id', 'year', 'month', 'amount'
+        ),
+    )
+
+
+def build_overview(first_day, months, salary_rows, variable_rows, installment_rows, rules, fixed_overrides):
+    periods = [first_day + relativedelta(months=i) for i in range(months)]
+    zero = Decimal('0.00')
+    salary = dict(salary_rows)
+    variable = {(year, month): total for year, month, total in variable_rows}
+    installments = {(year, month): total for year, month, total in installment_rows}
+
+    # Cada regra soma seu valor no mês inicial e subtrai após o último (soma de prefixos).
+    fixed_steps = [zero] * (months + 1)
+    rules = {rule.pk: rule for rule in rules}
+    for rule in rules.values():
+        start = max(months_between(first_day, rule.start_date), 0)
+        stop = months if rule.end_date is None else min(months_between(first_day, rule.end_date) + 1, months)
+        fixed_steps[start] += rule.monthly_amount
+        fixed_steps[stop] -= rule.monthly_amount
+    fixed = {}
+    for fixed_expense_id, year, month, amount in fixed_overrides:
+        rule = rules.get(fixed_expense_id)
+        if rule is not None and rule.covers(year, month):
+            fixed[(year, month)] = fixed.get((year, month), zero) + amount - rule.monthly_amount
+
+    overview = []
+    fixed_running = zero
+    for index, period in enumerate(periods):
+        key = (period.year, period.month)
+        fixed_running += fixed_steps[index]
+        row = {
+            'year': period.year,
+            'month': period.month,
+            'salary': salary.get(period.year, zero),
+            'variable_total': variable.get(key, zero),
+            'installment_total': installments.get(key, zero),
+            'fixed_total': fixed_running + fixed.get(key, zero),
+        }
+        row['total_expenses'] = row['variable_total'] + row['installment_total'] + row['fixed_total']
+        row['balance'] = row['salary'] - row['total_expenses']
+        for field in ('salary', 'variable_total', 'installment_total', 'fixed_total', 'total_expenses', 'balance'):
+            row[field] = Decimal(row[field]).quantize(CENT)
+        overview.append(row)
+    return overview
+
+
+def compute_overview(user_id, first_month, months):
+    first_day = first_month.replace(day=1)
+    end_day = first_day + relativedelta(months=months)
+    return build_overview(first_day, months, *(list(queryset) for queryset in overview_querysets(
+        user_id, first_day, end_day
+    )))
+
+
+async def acompute_overview(user_id, first_month, months):
+    first_day = first_month.replace(day=1)
+    end_day = first_day + relativedelta(months=months)
+    results = await asyncio.gather(*(_alist(queryset) for queryset in overview_querysets(user_id, first_day, end_day)))
+    return build_overview(first_day, months, *results)
+
+
+def get_overview(user_id, first_month, months):
+    return cached_for_user(
+        user_id, 'overview', (first_month.year, first_month.month, months),
+        lambda: compute_overview(user_id, first_month, months)
+    )
+
+
+async def aget_overview(user_id, first_month, months):
+    return await acached_for_user(
+        user_id, 'overview', (first_month.year, first_month.month, months),
+        lambda: acompute_overview(user_id, first_month, months)
+    )
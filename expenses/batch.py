@@ -0,0 +1,100 @@
+from django.db import transaction
+
+from .forms import ExpenseForm, FixedExpenseForm, SalaryForm
+from .models import Expense, FixedExpense, Salary, IdempotencyKey
+
+MAX_BATCH_ITEMS = 500
+MAX_KEY_LENGTH = 64
+
+FORMS = {
+    'expense': (ExpenseForm, Expense),
+    'fixed_expense': (FixedExpenseForm, FixedExpense),
+    'salary': (SalaryForm, Salary),
+}
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _form_for(object_type, data, user):
+    return FORMS[object_type][0](data=data, user=user)
+
+
+def apply_batch(user, items):
+    if not isinstance(items, list):
+        raise BatchError('"items" deve ser uma lista.')
+    if len(items) > MAX_BATCH_ITEMS:
+        raise BatchError(f'No máximo {MAX_BATCH_ITEMS} itens por lote.')
+
+    results = []
+    pending = {object_type: [] for object_type in FORMS}
+    with transaction.atomic():
+        keys = [item.get('key') for item in items if isinstance(item, dict)]
+        known = {
+            row.key: row
+            for row in IdempotencyKey.objects.filter(user=user, key__in=[key for key in keys if isinstance(key, str)])
+        }
+        seen = set()
+        salary_years = set()
+
+        for item in items:
+            key = item.get('key') if isinstance(item, dict) else None
+            object_type = item.get('type') if isinstance(item, dict) else None
+            result = {'key': key, 'type': object_type}
+            results.append(result)
+
+            if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+                result.update(status='invalid', errors={'key': [f'Informe uma chave de até {MAX_KEY_LENGTH} caracteres.']})
+                continue
+            if key in known:
+                result.update(status='duplicate', id=known[key].object_id, type=known[key].object_type)
+                continue
+            if key in seen:
+                result.update(status='duplicate')
+                continue
+            if object_type not in FORMS:
+                result.update(status='invalid', errors={'type': [f'Use um destes tipos: {", ".join(FORMS)}.']})
+                continue
+
+            data = item.get('data') or {}
+            if not isinstance(data, dict):
+                result.update(status='invalid', errors={'data': ['"data" deve ser um objeto.']})
+                continue
+
+            form = _form_for(object_type, data, user)
+            if not form.is_valid():
+                result.update(status='invalid', errors={field: list(messages) for field, messages in form.errors.items()})
+                continue
+            if object_type == 'salary':
+                if form.cleaned_data['year'] in salary_years:
+                    result.update(status='invalid', errors={'year': ['Ano repetido neste lote.']})
+                    continue
+                salary_years.add(form.cleaned_data['year'])
+
+            seen.add(key)
+            instance = form.instance
+            instance.user = user
+            pending[object_type].append((result, instance))
+
+        created = {
+            'expense': Expense.objects.bulk_create_with_installments([i for _, i in pending['expense']]),
+            'fixed_expense': FixedExpense.objects.bulk_create_rules([i for _, i in pending['fixed_expense']]),
+            'salary': Salary.objects.bulk_create_with_ledger([i for _, i in pending['salary']]),
+        }
+        idempotency_keys = []
+        for object_type, instances in created.items():
+            for (result, _), instance in zip(pending[object_type], instances):
+                result.update(status='created', id=instance.pk)
+                idempotency_keys.append(IdempotencyKey(
+                    user=user, key=result['key'], object_type=object_type, object_id=instance.pk
+                ))
+        IdempotencyKey.objects.bulk_create(idempotency_keys)
+
+    # Itens repetidos dentro do próprio lote apontam para o registro criado pelo primeiro.
+    first_by_key = {result['key']: result for result in results if result.get('status') == 'created'}
+    for result in results:
+        if result.get('status') == 'duplicate' and 'id' not in result:
+            original = first_by_key.get(result['key'], {})
+            result.update(id=original.get('id'), type=original.get('type'))
+    return results
@@ -0,0 +1,54 @@
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .sync import last_change
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def user_version(user_id):
+    # Lida do banco principal (ver sync.last_change), e não de um contador no cache: o cache
+    # é por processo, e gravações de outro worker ou de um comando não o incrementariam.
+    return last_change(user_id)
+
+
+async def auser_version(user_id):
+    return await sync_to_async(user_version)(user_id)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def cache_stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def cached_for_user(user_id, namespace, parts, compute):
+    key = ':'.join(['finance', namespace, str(user_id), str(user_version(user_id)), *map(str, parts)])
+    value = cache.get(key)
+    if value is not None:
+        _count('hits')
+        return value
+    _count('misses')
+    value = compute()
+    cache.set(key, value, timeout=getattr(settings, 'FINANCE_CACHE_TIMEOUT', 60 * 60))
+    return value
+
+
+async def acached_for_user(user_id, namespace, parts, compute):
+    key = ':'.join(['finance', namespace, str(user_id), str(await auser_version(user_id)), *map(str, parts)])
+    value = await cache.aget(key)
+    if value is not None:
+        _count('hits')
+        return value
+    _count('misses')
+    value = await compute()
+    await cache.aset(key, value, timeout=getattr(settings, 'FINANCE_CACHE_TIMEOUT', 60 * 60))
+    return value
@@ -0,0 +1,52 @@
+import os
+
+from matplotlib.figure import Figure
+
+COLORS = {
+    'variable_total': '#fd7e1d',
+    'installment_total': '#337ab7',
+    'fixed_total': '#6c757d',
+    'salary': '#04ba04',
+    'total_expenses': '#f3322b',
+    'balance': '#333333',
+}
+
+LABELS = {
+    'variable_total': 'Variáveis',
+    'installment_total': 'Parcelas',
+    'fixed_total': 'Fixos',
+    'salary': 'Salário',
+    'total_expenses': 'Despesas',
+    'balance': 'Saldo',
+}
+
+
+def render_chart(kind, data, path, file_format):
+    # Roda nos processos do pool: usa só matplotlib (sem Django) e a Figure direta, sem pyplot.
+    figure = Figure(figsize=(7, 3.5), dpi=100)
+    axes = figure.subplots()
+
+    if kind == 'breakdown':
+        fields = ['variable_total', 'installment_total', 'fixed_total']
+        values = [data['rows'][0][field] for field in fields]
+        bars = axes.bar([LABELS[f] for f in fields], values, color=[COLORS[f] for f in fields])
+        axes.bar_label(bars, labels=[f'R$ {v:,.2f}' for v in values])
+        if data['rows'][0]['salary']:
+            axes.axhline(data['rows'][0]['salary'], color=COLORS['salary'], linestyle='--', label=LABELS['salary'])
+            axes.legend(loc='upper right')
+    else:
+        labels = [f"{row['month']:02d}/{str(row['year'])[2:]}" for row in data['rows']]
+        for field in ('salary', 'total_expenses', 'balance'):
+            axes.plot(labels, [row[field] for row in data['rows']], marker='o', color=COLORS[field], label=LABELS[field])
+        axes.axhline(0, color='#cccccc', linewidth=0.8)
+        axes.legend(loc='upper left', fontsize='small')
+        axes.tick_params(axis='x', labelrotation=45, labelsize='small')
+
+    axes.set_title(data['title'])
+    axes.spines[['top', 'right']].set_visible(False)
+    figure.tight_layout()
+
+    temporary = f'{path}.{os.getpid()}.tmp'
+    figure.savefig(temporary, format=file_format)
+    os.replace(temporary, path)
+    return path
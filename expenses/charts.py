@@ -0,0 +1,97 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+
+from django.conf import settings
+
+from .balance import get_overview
+from .chart_render import render_chart
+
+CHART_TYPES = ('breakdown', 'trend')
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+class ChartTimeout(Exception):
+    pass
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(discard=None):
+    global _executor
+    with _executor_lock:
+        if discard is not None and _executor is discard:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, 'CHART_WORKERS', 2),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _executor
+
+
+def chart_data(user_id, kind, year, month=None):
+    if kind == 'breakdown':
+        rows = get_overview(user_id, date(year, month, 1), 1)
+        title = f'Despesas de {month:02d}/{year}'
+    else:
+        rows = get_overview(user_id, date(year, 1, 1), 12)
+        title = f'Evolução em {year}'
+    fields = ('salary', 'variable_total', 'installment_total', 'fixed_total', 'total_expenses', 'balance')
+    return {
+        'title': title,
+        'rows': [
+            {'year': row['year'], 'month': row['month'], **{field: float(row[field]) for field in fields}}
+            for row in rows
+        ],
+    }
+
+
+def chart_path(user_id, kind, period, data, file_format):
+    digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+    directory = os.path.join(settings.MEDIA_ROOT, 'charts', str(user_id))
+    return directory, f'{kind}_{period}_', f'{digest}.{file_format}'
+
+
+def get_chart(user_id, kind, year, month=None, file_format='png', use_pool=True):
+    data = chart_data(user_id, kind, year, month)
+    period = f'{year}-{month:02d}' if kind == 'breakdown' else str(year)
+    directory, prefix, name = chart_path(user_id, kind, period, data, file_format)
+    path = os.path.join(directory, prefix + name)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    if use_pool:
+        executor = get_executor()
+        try:
+            future = executor.submit(render_chart, kind, data, path, file_format)
+            future.result(timeout=getattr(settings, 'CHART_RENDER_TIMEOUT', 30))
+        except BrokenProcessPool:
+            # Um worker morreu (ex.: falta de memória): recria o pool e renderiza aqui mesmo.
+            get_executor(discard=executor)
+            render_chart(kind, data, path, file_format)
+        except FutureTimeoutError:
+            # Pool ocupado: renderizar aqui só somaria carga. Se ainda estiver na fila, sai dela;
+            # se já começou, termina e grava o arquivo, que a próxima requisição encontra.
+            future.cancel()
+            raise ChartTimeout(f'O gráfico {kind} de {period} não ficou pronto a tempo.')
+    else:
+        render_chart(kind, data, path, file_format)
+
+    # Remove versões anteriores do mesmo gráfico/período.
+    for entry in os.scandir(directory):
+        if entry.name.startswith(prefix) and entry.name.endswith(f'.{file_format}') and entry.name != prefix + name:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    return path
@@ -0,0 +1,183 @@
+import csv
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from .models import Expense, Installment, FixedExpense, FixedExpenseOccurrence, period_q
+
+CHUNK_SIZE = 2000
+
+
+def expense_rows(user, start=None, end=None):
+    expenses = Expense.objects.filter(user=user)
+    if start:
+        expenses = expenses.filter(purchase_date__gte=start)
+    if end:
+        expenses = expenses.filter(purchase_date__lte=end)
+    yield from expenses.order_by('purchase_date', 'pk').values_list(
+        'purchase_date', 'description', 'total_amount', 'is_installment', 'installments_number'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def installment_rows(user, start=None, end=None):
+    installments = Installment.objects.filter(user=user)
+    if start:
+        installments = installments.filter(due_date__gte=start)
+    if end:
+        installments = installments.filter(due_date__lte=end)
+    yield from installments.order_by('due_date', 'pk').values_list(
+        'due_date', 'expense__description', 'installment_amount', 'expense__total_amount', 'expense__installments_number'
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def fixed_occurrence_rows(user, start=None, end=None):
+    # Gastos fixos sem término são exportados até o mês atual, se nenhum fim for informado.
+    # Os valores alterados são achados pelo mês; a linha só sai se o vencimento cair no período.
+    end = end or date.today()
+    rules = FixedExpense.objects.filter(user=user, start_date__lte=end)
+    overrides = FixedExpenseOccurrence.objects.filter(period_q(start or date.min, end), user=user)
+    if start:
+        rules = rules.active_between(start.replace(day=1), end + timedelta(days=1))
+    amounts = {(o[0], o[1], o[2]): o[3] for o in overrides.values_list('fixed_expense_id', 'year', 'month', 'amount')}
+    for rule in rules.order_by('start_date', 'pk').iterator(chunk_size=CHUNK_SIZE):
+        for year, month in rule.periods(start or rule.start_date, end):
+            occurrence = rule.build_occurrence(year, month)
+            if occurrence.occurrence_date > end or (start and occurrence.occurrence_date < start):
+                continue
+            yield (
+                occurrence.occurrence_date,
+                rule.description,
+                amounts.get((rule.pk, year, month), rule.monthly_amount),
+                rule.monthly_amount,
+            )
+
+
+EXPORTS = {
+    'expenses': (
+        'despesas',
+        ['Data da Compra', 'Descrição', 'Valor Total', 'Parcelado', 'Número de Parcelas'],
+        expense_rows,
+    ),
+    'installments': (
+        'parcelas',
+        ['Vencimento', 'Descrição', 'Valor da Parcela', 'Valor Total da Compra', 'Número de Parcelas'],
+        installment_rows,
+    ),
+    'fixed': (
+        'gastos_fixos',
+        ['Vencimento', 'Descrição', 'Valor no Mês', 'Valor Mensal Fixo'],
+        fixed_occurrence_rows,
+    ),
+}
+
+
+def _cell_text(value):
+    if isinstance(value, bool):
+        return 'Sim' if value else 'Não'
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows, rows_per_chunk=500):
+    writer = csv.writer(_Echo(), delimiter=';')
+    yield '\ufeff' + writer.writerow(headers)
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow([_cell_text(value) for value in row]))
+        if len(lines) >= rows_per_chunk:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+class _StreamBuffer:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, (int, Decimal)) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(_cell_text(value))}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+def stream_xlsx(sheet_name, headers, rows, rows_per_chunk=500):
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name)}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row(headers)
+            ).encode())
+            lines = []
+            for row in rows:
+                lines.append(_xlsx_row(row))
+                if len(lines) >= rows_per_chunk:
+                    sheet.write(''.join(lines).encode())
+                    lines = []
+                    yield buffer.drain()
+            sheet.write((''.join(lines) + '</sheetData></worksheet>').encode())
+    yield buffer.drain()
@@ -0,0 +1,68 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models import Value
+
+
+def to_cents(value):
+    if isinstance(value, float):
+        value = str(value)
+    return int((Decimal(value) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+class MoneyField(models.BigIntegerField):
+    """Valor em reais guardado como inteiro de centavos.
+
+    No Python continua sendo um Decimal com duas casas; no banco as somas são de inteiros,
+    sem os arredondamentos de ponto flutuante que o SQLite aplica a colunas decimais.
+    """
+
+    description = "Valor monetário (centavos)"
+
+    def __init__(self, *args, max_digits=10, **kwargs):
+        self.max_digits = max_digits
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.max_digits != 10:
+            kwargs['max_digits'] = self.max_digits
+        return name, path, args, kwargs
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return from_cents(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            return from_cents(to_cents(value))
+        except (ArithmeticError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid'], code='invalid', params={'value': value})
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None or hasattr(value, 'as_sql'):
+            return value
+        return to_cents(value)
+
+    def formfield(self, **kwargs):
+        return models.Field.formfield(self, **{
+            'form_class': forms.DecimalField,
+            'max_digits': self.max_digits,
+            'decimal_places': 2,
+            **kwargs,
+        })
+
+
+def money(value):
+    """Valor em reais para usar em expressões (F('campo') + money(x)), convertido em centavos na consulta."""
+    return Value(value, output_field=MoneyField())
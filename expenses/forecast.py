@@ -0,0 +1,101 @@
+from datetime import date
+
+import numpy as np
+from dateutil.relativedelta import relativedelta
+from django.db.models import Sum
+
+from .models import FixedExpense, FixedExpenseOccurrence, Installment, Salary, months_between, period_q
+
+# Cada cenário é uma linha da matriz cenários x meses; as parcelas precisam caber em int64.
+MAX_SCENARIOS = 50
+MAX_INSTALLMENTS = 600
+
+
+class CashFlowForecast:
+    def __init__(self, start, salary, committed):
+        self.start = start
+        self.salary = np.asarray(salary, dtype=np.float64)
+        self.committed = np.asarray(committed, dtype=np.float64)
+
+    @property
+    def months(self):
+        return len(self.salary)
+
+    @classmethod
+    def for_user(cls, user_id, start=None, months=24):
+        start = (start or date.today()).replace(day=1)
+        end_day = start + relativedelta(months=months)
+        last_day = end_day - relativedelta(days=1)
+
+        salary_by_year = np.zeros(last_day.year - start.year + 1)
+        for year, amount in Salary.objects.filter(
+            user_id=user_id, year__gte=start.year, year__lte=last_day.year
+        ).values_list('year', 'amount'):
+            salary_by_year[year - start.year] = float(amount)
+        month_index = np.arange(months)
+        salary = salary_by_year[(start.month - 1 + month_index) // 12]
+
+        committed = np.zeros(months)
+        installments = np.array(list(
+            Installment.objects.filter(period_q(start, last_day), user_id=user_id).values('year', 'month').annotate(
+                total=Sum('installment_amount')
+            ).order_by().values_list('year', 'month', 'total')
+        ), dtype=np.float64).reshape(-1, 3)
+        if len(installments):
+            index = ((installments[:, 0] - start.year) * 12 + installments[:, 1] - start.month).astype(np.int64)
+            np.add.at(committed, index, installments[:, 2])
+
+        # Gastos fixos entram como degraus (início/fim) e viram valores mensais por soma acumulada.
+        steps = np.zeros(months + 1)
+        rules = {}
+        for pk, amount, start_date, end_date in FixedExpense.objects.filter(user_id=user_id).active_between(
+            start, end_day
+        ).values_list('pk', 'monthly_amount', 'start_date', 'end_date'):
+            first = max(months_between(start, start_date), 0)
+            stop = months if end_date is None else min(months_between(start, end_date) + 1, months)
+            steps[first] += float(amount)
+            steps[stop] -= float(amount)
+            rules[pk] = (float(amount), first, stop)
+        committed += np.cumsum(steps[:-1])
+
+        for fixed_expense_id, year, month, amount in FixedExpenseOccurrence.objects.filter(
+            period_q(start, last_day), fixed_expense_id__in=list(rules)
+        ).values_list('fixed_expense_id', 'year', 'month', 'amount'):
+            rule_amount, first, stop = rules[fixed_expense_id]
+            index = (year - start.year) * 12 + month - start.month
+            if first <= index < stop:
+                committed[index] += float(amount) - rule_amount
+
+        return cls(start, salary, committed)
+
+    def balances(self):
+        return self.salary - self.committed
+
+    def cumulative_savings(self, initial=0.0):
+        return initial + np.cumsum(self.balances())
+
+    def _purchases(self, totals, installments, offsets):
+        totals = np.atleast_1d(np.asarray(totals, dtype=np.float64))
+        installments = np.atleast_1d(np.asarray(installments, dtype=np.int64))
+        offsets = np.zeros_like(installments) if offsets is None else np.atleast_1d(np.asarray(offsets, dtype=np.int64))
+        return totals / installments, installments, offsets
+
+    def purchase_schedule(self, totals, installments, offsets=None):
+        amounts, installments, offsets = self._purchases(totals, installments, offsets)
+        month_index = np.arange(self.months)
+        active = (month_index >= offsets[:, None]) & (month_index < (offsets + installments)[:, None])
+        return active * amounts[:, None]
+
+    def with_purchase(self, total, installments, offset=0):
+        schedule = self.purchase_schedule(total, installments, offset)[0]
+        return CashFlowForecast(self.start, self.salary, self.committed + schedule)
+
+    def scenario_savings(self, totals, installments, offsets=None, initial=0.0):
+        # Parcelas pagas até o mês t = clip(t + 1 - início, 0, n); evita um cumsum por cenário.
+        amounts, installments, offsets = self._purchases(totals, installments, offsets)
+        paid = np.clip(np.arange(1, self.months + 1) - offsets[:, None], 0, installments[:, None])
+        return self.cumulative_savings(initial) - paid * amounts[:, None]
+
+    def can_afford(self, totals, installments, offsets=None, initial=0.0, minimum=0.0):
+        savings = self.scenario_savings(totals, installments, offsets, initial)
+        return savings.min(axis=1) >= minimum
@@ -1,16 +1,44 @@
 from django import forms
-from .models import Expense, Salary, FixedExpense 
+from .models import Category, Expense, Salary, FixedExpense, FixedExpenseOccurrence, months_between
 from django.utils import timezone
 
-class ExpenseForm(forms.ModelForm):
+class CategoryChoiceMixin:
+    """Mostra no campo de categoria só as categorias do usuário."""
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+        self.fields["category"].queryset = Category.objects.filter(user=self.user) if self.user else Category.objects.none()
+        self.fields["category"].empty_label = "Sem categoria"
+
+class CategoryForm(forms.ModelForm):
+    class Meta:
+        model = Category
+        fields = ["name"]
+        labels = {
+            "name": "Nome"
+        }
+
+    def __init__(self, *args, **kwargs):
+        self.user = kwargs.pop('user', None)
+        super().__init__(*args, **kwargs)
+
+    def clean_name(self):
+        name = self.cleaned_data.get("name", "").strip()
+        if Category.objects.filter(user=self.user, name__iexact=name).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("Você já tem uma categoria com este nome.")
+        return name
+
+class ExpenseForm(CategoryChoiceMixin, forms.ModelForm):
     class Meta:
         model = Expense
-        fields = ["description", "total_amount", "purchase_date", "is_installment", "installments_number"]
+        fields = ["description", "category", "total_amount", "purchase_date", "is_installment", "installments_number"]
         widgets = {
             "purchase_date": forms.DateInput(attrs={"type": "date"}),
         }
         labels = {
             "description": "Descrição",
+            "category": "Categoria",
             "total_amount": "Valor Total",
             "purchase_date": "Data da Compra",
             "is_installment": "É Parcelado?",
@@ -60,19 +88,94 @@ class SalaryForm(forms.ModelForm):
             )
         return year
 
-class FixedExpenseForm(forms.ModelForm):
+class FixedExpenseForm(CategoryChoiceMixin, forms.ModelForm):
     class Meta:
         model = FixedExpense
-        fields = ["description", "monthly_amount", "start_date"]
+        fields = ["description", "category", "monthly_amount", "start_date", "end_date"]
         widgets = {
             "start_date": forms.DateInput(attrs={"type": "date"}),
+            "end_date": forms.DateInput(attrs={"type": "date"}),
         }
         labels = {
             "description": "Descrição",
+            "category": "Categoria",
             "monthly_amount": "Valor Mensal Fixo",
-            "start_date": "Data de Início (Primeiro Mês)"
+            "start_date": "Data de Início (Primeiro Mês)",
+            "end_date": "Data de Término (Último Mês)"
         }
         help_texts = {
-            "start_date": "Este gasto será repetido automaticamente pelos próximos 12 meses a partir desta data."
+            "start_date": "Este gasto será repetido automaticamente todos os meses a partir desta data.",
+            "end_date": "Deixe em branco para um gasto fixo sem data de término."
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get("start_date")
+        end_date = cleaned_data.get("end_date")
+
+        if start_date and end_date and months_between(start_date, end_date) < 0:
+            self.add_error("end_date", "O mês de término não pode ser anterior ao mês de início.")
+
+        return cleaned_data
+
+class EditFixedExpenseForm(FixedExpenseForm):
+    scope = forms.ChoiceField(
+        label="Aplicar alteração",
+        choices=[
+            ("all", "Em todos os meses"),
+            ("forward", "Somente a partir deste mês"),
+        ],
+        initial="all",
+        widget=forms.RadioSelect,
+        help_text="Ao aplicar a partir deste mês, os meses anteriores mantêm os valores atuais."
+    )
+
+class FixedExpenseOccurrenceForm(forms.ModelForm):
+    class Meta:
+        model = FixedExpenseOccurrence
+        fields = ["amount"]
+        labels = {
+            "amount": "Valor neste Mês"
+        }
+
+class ImportExpensesForm(forms.Form):
+    file = forms.FileField(label="Arquivo do Extrato")
+    file_format = forms.ChoiceField(
+        label="Formato",
+        choices=[("csv", "CSV"), ("ofx", "OFX")],
+        initial="csv"
+    )
+    encoding = forms.ChoiceField(
+        label="Codificação",
+        choices=[("utf-8-sig", "UTF-8"), ("cp1252", "Windows-1252 (Latin-1)")],
+        initial="utf-8-sig",
+        help_text="Extratos OFX de bancos brasileiros costumam usar Windows-1252."
+    )
+    expense_sign = forms.ChoiceField(
+        label="Despesas no CSV",
+        choices=[
+            ("negative", "Valores negativos (extrato de conta)"),
+            ("positive", "Valores positivos (fatura de cartão)"),
+        ],
+        initial="negative",
+        help_text="Linhas com o sinal contrário (créditos, estornos) não são importadas. No OFX só os débitos são importados."
+    )
+
+class ExportForm(forms.Form):
+    dataset = forms.ChoiceField(
+        label="Dados",
+        choices=[("expenses", "Despesas Variáveis"), ("installments", "Parcelas"), ("fixed", "Gastos Fixos (mês a mês)")]
+    )
+    file_format = forms.ChoiceField(label="Formato", choices=[("csv", "CSV"), ("xlsx", "Excel (XLSX)")])
+    start = forms.DateField(label="De", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    end = forms.DateField(label="Até", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get("start")
+        end = cleaned_data.get("end")
+
+        if start and end and end < start:
+            self.add_error("end", "A data final não pode ser anterior à data inicial.")
+
+        return cleaned_data
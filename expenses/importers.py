@@ -0,0 +1,169 @@
+import csv
+import re
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from .forms import ExpenseForm
+from .models import Expense
+
+CSV_COLUMNS = {
+    'date': ('data', 'date', 'data da compra', 'data lançamento', 'data lancamento'),
+    'description': ('descrição', 'descricao', 'description', 'histórico', 'historico', 'lançamento', 'lancamento'),
+    'amount': ('valor', 'amount', 'valor (r$)', 'value'),
+    'installments': ('parcelas', 'installments', 'número de parcelas', 'numero de parcelas'),
+}
+
+MAX_REPORTED_ERRORS = 100
+
+# Sinal das despesas no CSV. Extratos de conta trazem débitos negativos e créditos positivos;
+# faturas de cartão costumam trazer as compras positivas e estornos/pagamentos negativos.
+EXPENSE_SIGNS = ('negative', 'positive')
+
+
+def normalize_amount(value):
+    value = (value or '').strip().replace('R$', '').replace(' ', '')
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        return None
+    # Decimal aceita 'NaN' e 'Infinity', que não são valores (e não se comparam com zero).
+    return amount if amount.is_finite() else None
+
+
+def parse_csv(stream, expense_sign='negative'):
+    header_line = stream.readline()
+    delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+    header = [column.strip().lower() for column in next(csv.reader([header_line], delimiter=delimiter))]
+
+    positions = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for index, column in enumerate(header):
+            if column in aliases:
+                positions[field] = index
+                break
+
+    for line_number, row in enumerate(csv.reader(stream, delimiter=delimiter), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        values = {field: row[index].strip() if index < len(row) else '' for field, index in positions.items()}
+        amount = normalize_amount(values.get('amount'))
+        # Como no OFX, lançamentos com o sinal contrário (créditos) não são despesas.
+        if amount is not None and (amount > 0 if expense_sign == 'negative' else amount < 0):
+            continue
+        yield line_number, {
+            'date': values.get('date', ''),
+            'description': values.get('description', ''),
+            'amount': abs(amount) if amount is not None else None,
+            'installments': values.get('installments', ''),
+        }
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Z0-9.]+)>([^<]*)')
+
+
+def _ofx_tokens(stream, chunk_size=64 * 1024):
+    buffer = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        # Só processa até a última tag completa; o restante espera o próximo bloco.
+        end = buffer.rfind('<') if chunk else len(buffer)
+        if end > 0:
+            for match in OFX_TAG.finditer(buffer, 0, end):
+                yield match.group(1) == '/', match.group(2), match.group(3).strip()
+            buffer = buffer[end:]
+        if not chunk:
+            return
+
+
+def parse_ofx(stream):
+    transaction = None
+    count = 0
+    for closing, tag, value in _ofx_tokens(stream):
+        if tag == 'STMTTRN':
+            if not closing:
+                transaction = {}
+                continue
+            if transaction is not None:
+                count += 1
+                amount = normalize_amount(transaction.get('TRNAMT'))
+                # Créditos (valores positivos) não são despesas.
+                if amount is None or amount < 0:
+                    posted = transaction.get('DTPOSTED', '')[:8]
+                    yield count, {
+                        'date': f'{posted[:4]}-{posted[4:6]}-{posted[6:8]}' if len(posted) == 8 else '',
+                        'description': transaction.get('MEMO') or transaction.get('NAME', ''),
+                        'amount': abs(amount) if amount is not None else None,
+                        'installments': '',
+                    }
+            transaction = None
+        elif transaction is not None and not closing and value:
+            transaction[tag] = value
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': parse_ofx,
+}
+
+
+def validated_expenses(rows, user, result):
+    for line_number, row in rows:
+        result.processed += 1
+        try:
+            installments = int(row['installments'] or 1)
+        except ValueError:
+            installments = 0
+        form = ExpenseForm(data={
+            'description': row['description'][:255],
+            'total_amount': row['amount'] if row['amount'] is not None else '',
+            'purchase_date': row['date'],
+            'is_installment': 'on' if installments != 1 else '',
+            'installments_number': installments,
+        })
+        if not form.is_valid():
+            result.add_error(line_number, form.errors)
+            continue
+        expense = form.instance
+        expense.user = user
+        yield expense
+
+
+class ImportResult:
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def add_error(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            messages = '; '.join(f'{field}: {" ".join(msgs)}' for field, msgs in errors.items())
+            self.errors.append((line_number, messages))
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+def import_expenses(stream, user, file_format='csv', batch_size=1000, progress=None, expense_sign='negative'):
+    result = ImportResult()
+    start = time.perf_counter()
+    rows = parse_csv(stream, expense_sign) if file_format == 'csv' else PARSERS[file_format](stream)
+    expenses = validated_expenses(rows, user, result)
+    while True:
+        batch = list(islice(expenses, batch_size))
+        if not batch:
+            break
+        Expense.objects.bulk_create_with_installments(batch, batch_size=batch_size)
+        result.created += len(batch)
+        result.elapsed = time.perf_counter() - start
+        if progress:
+            progress(result)
+    result.elapsed = time.perf_counter() - start
+    return result
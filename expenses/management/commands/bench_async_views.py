@@ -0,0 +1,73 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+
+from expenses.models import Expense, FixedExpense, MonthlyLedger, Salary
+
+
+class Command(BaseCommand):
+    help = "Mede N requisições simultâneas ao saldo mensal: threads (uma por requisição) contra o handler ASGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=120)
+
+    def handle(self, *args, **options):
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        user, _ = User.objects.get_or_create(username='__bench_async__')
+        self.seed(user)
+        urls = [
+            f'/balance/?month={index % 12 + 1}&year={2020 + index // 12 % 10}'
+            for index in range(options['requests'])
+        ]
+
+        try:
+            for label, run in (('threads (WSGI)', self.threaded), ('asyncio (ASGI)', self.asynchronous)):
+                cache.clear()
+                MonthlyLedger.objects.filter(user=user).delete()
+                start = time.perf_counter()
+                statuses = run(user, urls)
+                elapsed = time.perf_counter() - start
+                ok = statuses.count(200)
+                self.stdout.write(
+                    f'{label}: {len(urls)} requisições em {elapsed * 1000:.0f} ms '
+                    f'({len(urls) / elapsed:.0f} req/s, {ok} com status 200)'
+                )
+        finally:
+            Expense.objects.filter(user=user).delete()
+            FixedExpense.objects.filter(user=user).delete()
+            user.delete()
+
+    def seed(self, user):
+        if Salary.objects.filter(user=user).exists():
+            return
+        for year in range(2020, 2030):
+            Salary(user=user, year=year, amount=Decimal('5000.00')).save()
+        Expense.objects.bulk_create_with_installments([
+            Expense(description=f'Compra {index}', total_amount=Decimal(100 + index),
+                    purchase_date=date(2020 + index % 10, index % 12 + 1, index % 28 + 1),
+                    is_installment=index % 3 == 0, installments_number=6 if index % 3 == 0 else 1, user=user)
+            for index in range(2000)
+        ])
+        FixedExpense(description='Aluguel', monthly_amount=Decimal('1500.00'), start_date=date(2020, 1, 5), user=user).save()
+
+    def threaded(self, user, urls):
+        client = Client()
+        client.force_login(user)
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            return [response.status_code for response in pool.map(client.get, urls)]
+
+    def asynchronous(self, user, urls):
+        async def run():
+            client = AsyncClient()
+            await client.aforce_login(user)
+            responses = await asyncio.gather(*(client.get(url) for url in urls))
+            return [response.status_code for response in responses]
+        return asyncio.run(run())
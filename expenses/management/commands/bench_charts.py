@@ -0,0 +1,53 @@
+import shutil
+import time
+from decimal import Decimal
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from expenses.charts import get_chart, get_executor
+from expenses.models import Expense, Salary
+
+
+class Command(BaseCommand):
+    help = "Mede o custo de renderização dos gráficos: frio (em processo e no pool) e servido do cache em disco."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=12)
+
+    def handle(self, *args, **options):
+        renders = options['renders']
+        user, _ = User.objects.get_or_create(username='__bench_charts__')
+        if not Salary.objects.filter(user=user).exists():
+            Salary(user=user, year=2025, amount=Decimal('5000.00')).save()
+            for month in range(1, 13):
+                Expense(description='Mercado', total_amount=Decimal(300 + month * 10),
+                        purchase_date=date(2025, month, 5), user=user).save()
+
+        try:
+            for file_format in ('png', 'svg'):
+                self.reset(user)
+                inline = self.measure(user, renders, file_format, use_pool=False)
+                self.reset(user)
+                get_executor().submit(int).result()
+                pooled = self.measure(user, renders, file_format, use_pool=True)
+                cached = self.measure(user, renders, file_format, use_pool=True)
+                self.stdout.write(
+                    f'{file_format}: frio no processo {inline:7.1f} ms | frio no pool {pooled:7.1f} ms | '
+                    f'cache em disco {cached:6.2f} ms (média por gráfico)'
+                )
+        finally:
+            self.reset(user)
+            user.delete()
+
+    def reset(self, user):
+        from django.conf import settings
+        import os
+        shutil.rmtree(os.path.join(settings.MEDIA_ROOT, 'charts', str(user.pk)), ignore_errors=True)
+
+    def measure(self, user, renders, file_format, use_pool):
+        start = time.perf_counter()
+        for month in range(1, renders + 1):
+            get_chart(user.pk, 'breakdown', 2025, (month - 1) % 12 + 1, file_format, use_pool=use_pool)
+        return (time.perf_counter() - start) * 1000 / renders
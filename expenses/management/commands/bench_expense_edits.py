@@ -0,0 +1,63 @@
+import time
+from decimal import Decimal
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from expenses.models import Expense, Installment, MonthlyLedger, merge_deltas
+
+
+EDITS = {
+    'descrição': lambda expense: setattr(expense, 'description', expense.description + '*'),
+    'valor total': lambda expense: setattr(expense, 'total_amount', expense.total_amount + 10),
+    'parcelas +1': lambda expense: setattr(expense, 'installments_number', expense.installments_number + 1),
+    'data da compra': lambda expense: setattr(expense, 'purchase_date', expense.purchase_date.replace(day=2)),
+}
+
+
+class Command(BaseCommand):
+    help = "Compara a edição de despesas parceladas: apagar e recriar parcelas contra atualização por diferença."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expenses', type=int, default=200)
+        parser.add_argument('--installments', type=int, default=24)
+
+    def handle(self, *args, **options):
+        for label, edit in EDITS.items():
+            for mode, save in (('apagar e recriar', self.recreate), ('por diferença', Expense.save)):
+                elapsed, queries = self.measure(options['expenses'], options['installments'], edit, save)
+                self.stdout.write(
+                    f'{label:15} {mode:17} {elapsed * 1000 / options["expenses"]:7.2f} ms/edição  '
+                    f'{queries / options["expenses"]:5.1f} consultas/edição'
+                )
+
+    def measure(self, count, installments, edit, save):
+        with transaction.atomic():
+            user = User.objects.create(username='__bench_expense_edits__')
+            Expense.objects.bulk_create_with_installments(
+                Expense(description=f'Compra {i}', total_amount=Decimal('1200.00'), purchase_date=date(2024, 1, 10),
+                        is_installment=True, installments_number=installments, user=user)
+                for i in range(count)
+            )
+            expenses = list(Expense.objects.filter(user=user))
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for expense in expenses:
+                    edit(expense)
+                    save(expense)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed, len(queries.captured_queries)
+
+    @staticmethod
+    def recreate(expense):
+        # Comportamento anterior: relê a linha e recria todas as parcelas se o cronograma mudou.
+        old = Expense.objects.get(pk=expense.pk)
+        super(Expense, expense).save()
+        if any(getattr(old, field) != getattr(expense, field) for field in Expense.SCHEDULE_FIELDS):
+            Installment.objects.filter(expense=expense).delete()
+            Installment.objects.bulk_create(expense.build_installments())
+        MonthlyLedger.adjust(expense.user_id, merge_deltas(old.ledger_deltas(-1), expense.ledger_deltas()))
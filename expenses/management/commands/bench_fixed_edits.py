@@ -0,0 +1,55 @@
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from expenses.models import FixedExpense, FixedExpenseOccurrence, MonthlyLedger
+
+
+class Command(BaseCommand):
+    help = "Mede a edição de gastos fixos (todos os meses e a partir de um mês) para um usuário com muitas regras."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rules', type=int, default=300)
+        parser.add_argument('--overrides', type=int, default=6, help="Ajustes mensais por regra.")
+
+    def handle(self, *args, **options):
+        for label, edit in (
+            ('todos os meses', lambda rule: rule.save()),
+            ('a partir de 07/2025', lambda rule: rule.save_from(date(2025, 7, 1))),
+        ):
+            elapsed, queries = self.measure(options['rules'], options['overrides'], edit)
+            self.stdout.write(
+                f'{label:20} {options["rules"]} regras: {elapsed * 1000 / options["rules"]:6.2f} ms/edição  '
+                f'{queries / options["rules"]:5.1f} consultas/edição'
+            )
+
+    def measure(self, count, overrides, edit):
+        with transaction.atomic():
+            user = User.objects.create(username='__bench_fixed_edits__')
+            rules = FixedExpense.objects.bulk_create(
+                FixedExpense(description=f'Gasto {i}', monthly_amount=Decimal('100.00'),
+                             start_date=date(2025, 1, 1 + i % 28), user=user)
+                for i in range(count)
+            )
+            occurrences = [rule.build_occurrence(2025, month) for rule in rules for month in range(1, overrides + 1)]
+            for occurrence in occurrences:
+                occurrence.amount = Decimal('90.00')
+            FixedExpenseOccurrence.objects.bulk_create(occurrences)
+            MonthlyLedger.objects.bulk_create(
+                MonthlyLedger.compute(user.pk, 2025 + i // 12, i % 12 + 1) for i in range(24)
+            )
+
+            rules = list(FixedExpense.objects.filter(user=user))
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for rule in rules:
+                    rule.monthly_amount = Decimal('120.00')
+                    edit(rule)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed, len(queries.captured_queries)
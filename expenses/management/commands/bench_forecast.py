@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from expenses.forecast import CashFlowForecast
+
+
+def python_can_afford(salary, committed, totals, installments, initial=0.0, minimum=0.0):
+    results = []
+    for total, count in zip(totals, installments):
+        amount = total / count
+        savings = initial
+        affordable = True
+        for month in range(len(salary)):
+            savings += salary[month] - committed[month] - (amount if month < count else 0.0)
+            if savings < minimum:
+                affordable = False
+        results.append(affordable)
+    return results
+
+
+class Command(BaseCommand):
+    help = "Compara a previsão vetorizada (NumPy) de 'posso comprar?' com um laço em Python puro."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=120)
+        parser.add_argument('--scenarios', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        months, scenarios, repeat = options['months'], options['scenarios'], options['repeat']
+        rng = np.random.default_rng(42)
+        salary = np.full(months, 5000.0)
+        committed = rng.uniform(1500, 4500, months)
+        totals = rng.uniform(100, 20000, scenarios)
+        installments = rng.integers(1, 49, scenarios)
+        forecast = CashFlowForecast(None, salary, committed)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            vectorized = forecast.can_afford(totals, installments, initial=2000.0)
+        numpy_time = (time.perf_counter() - start) / repeat
+
+        salary_list, committed_list = salary.tolist(), committed.tolist()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            baseline = python_can_afford(salary_list, committed_list, totals.tolist(), installments.tolist(), initial=2000.0)
+        python_time = (time.perf_counter() - start) / repeat
+
+        assert vectorized.tolist() == baseline
+        self.stdout.write(f'{scenarios} cenários x {months} meses')
+        self.stdout.write(f'NumPy:       {numpy_time * 1000:8.2f} ms')
+        self.stdout.write(f'Python puro: {python_time * 1000:8.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'{python_time / numpy_time:.1f}x mais rápido'))
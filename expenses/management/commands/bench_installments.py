@@ -0,0 +1,75 @@
+import time
+from decimal import Decimal
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from dateutil.relativedelta import relativedelta
+
+from expenses.models import Expense, Installment
+
+
+class Command(BaseCommand):
+    help = "Mede a geração de parcelas (linhas por segundo) antes e depois da inserção em lote."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expenses', type=int, default=1000)
+        parser.add_argument('--installments', type=int, default=48)
+
+    def handle(self, *args, **options):
+        self.expenses = options['expenses']
+        self.installments = options['installments']
+
+        for label, run in (
+            ('por linha (antes)', self.run_row_by_row),
+            ('save() com bulk_create', self.run_save),
+            ('bulk_create_with_installments', self.run_bulk),
+        ):
+            elapsed = self.measure(run)
+            rows = self.expenses * (self.installments + 1)
+            self.stdout.write(f'{label:32} {elapsed:8.3f}s  {rows / elapsed:12.0f} linhas/s')
+
+    def measure(self, run):
+        start = time.perf_counter()
+        with transaction.atomic():
+            user = User.objects.create(username='__bench_installments__')
+            run(user)
+            transaction.set_rollback(True)
+        return time.perf_counter() - start
+
+    def new_expense(self, user, i):
+        return Expense(
+            description=f'Compra {i}',
+            total_amount=Decimal('1234.56'),
+            purchase_date=date(2024, 1, 1) + relativedelta(days=i % 365),
+            is_installment=True,
+            installments_number=self.installments,
+            user=user,
+        )
+
+    def run_row_by_row(self, user):
+        for i in range(self.expenses):
+            expense = self.new_expense(user, i)
+            models_save = super(Expense, expense).save
+            models_save()
+            installment_amount = expense.total_amount / Decimal(expense.installments_number)
+            for n in range(expense.installments_number):
+                due_date = expense.purchase_date + relativedelta(months=n)
+                Installment.objects.create(
+                    expense=expense,
+                    installment_amount=installment_amount,
+                    due_date=due_date,
+                    month=due_date.month,
+                    year=due_date.year,
+                    user=user
+                )
+
+    def run_save(self, user):
+        for i in range(self.expenses):
+            self.new_expense(user, i).save()
+
+    def run_bulk(self, user):
+        Expense.objects.bulk_create_with_installments(
+            self.new_expense(user, i) for i in range(self.expenses)
+        )
@@ -0,0 +1,43 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from expenses.models import Installment
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede o custo de ler valores monetários (conversão linha a linha) e de somá-los no banco, "
+        "e confere se a soma do banco bate com a soma exata em Python."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000, help="Linhas lidas nos testes de leitura.")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        installments = Installment.objects.order_by()
+        scenarios = (
+            ('leitura values_list', lambda: list(installments.values_list('installment_amount', flat=True)[:rows])),
+            ('leitura de modelos', lambda: list(installments.only('installment_amount')[:rows])),
+            ('SUM na tabela toda', lambda: installments.aggregate(total=Sum('installment_amount'))),
+            ('SUM por usuário/mês', lambda: list(
+                installments.values('user_id', 'year', 'month').annotate(total=Sum('installment_amount'))
+            )),
+        )
+        self.stdout.write(f'{installments.count()} parcelas; leitura de {rows} linhas; mediana de {options["repeat"]} execuções')
+        for label, run in scenarios:
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(f'{label:24} {statistics.median(timings) * 1000:10.1f} ms')
+
+        database_total = installments.aggregate(total=Sum('installment_amount'))['total'] or Decimal('0')
+        exact_total = sum(installments.values_list('installment_amount', flat=True).iterator(chunk_size=5000), Decimal('0'))
+        self.stdout.write(f'soma no banco: {database_total}  soma exata: {exact_total}  diferença: {database_total - exact_total}')
@@ -0,0 +1,89 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from expenses.models import Expense
+from expenses.search import search_descriptions
+
+MERCHANTS = (
+    'Mercado', 'Farmácia', 'Padaria', 'Posto', 'Restaurante', 'Lanchonete', 'Açougue', 'Hortifruti',
+    'Livraria', 'Papelaria', 'Pet shop', 'Loja', 'Magazine', 'Shopping', 'Ótica', 'Academia',
+)
+ITEMS = (
+    'compras do mês', 'remédios', 'pão', 'gasolina', 'almoço', 'jantar', 'lanche', 'carne', 'frutas',
+    'livros', 'cadernos', 'ração', 'roupas', 'sapatos', 'presente', 'óculos', 'mensalidade', 'eletrônicos',
+)
+# Termos raros, como a compra que se quer achar anos depois.
+NEEDLES = ('Amazon Kindle', 'Conserto da geladeira', 'Passagem aérea Recife')
+QUERIES = ('amazon', 'kindle amaz', 'geladeira', 'farmacia remedios', 'mercado')
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a busca por descrição pelo índice FTS5 com um LIKE '%...%' na tabela de despesas. "
+        "As linhas de teste são criadas numa transação desfeita no final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            user = User.objects.create(username='__bench_search__')
+            start = time.perf_counter()
+            self.populate(user, options['rows'], rng)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{options["rows"]} despesas inseridas (com os gatilhos de busca) em {elapsed:.1f}s')
+            self.compare(user)
+            transaction.set_rollback(True)
+
+    def populate(self, user, rows, rng, batch_size=5000):
+        first_day = date.today() - timedelta(days=5 * 365)
+        batch = []
+        for i in range(rows):
+            if i % 20000 == 0:
+                description = rng.choice(NEEDLES)
+            else:
+                description = f'{rng.choice(MERCHANTS)} {rng.choice(ITEMS)} {rng.randrange(1000)}'
+            batch.append(Expense(
+                user=user, description=description, total_amount=Decimal(rng.randrange(100, 50000)) / 100,
+                purchase_date=first_day + timedelta(days=rng.randrange(5 * 365)),
+            ))
+            if len(batch) >= batch_size:
+                Expense.objects.bulk_create(batch)
+                batch = []
+        Expense.objects.bulk_create(batch)
+
+    def measure(self, run):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            result = run()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000, result
+
+    def compare(self, user):
+        last_year = date.today() - timedelta(days=365)
+        self.stdout.write(f'{"consulta":28} {"FTS5":>10} {"LIKE":>10} {"resultados":>11}')
+        for text, start in [(query, None) for query in QUERIES] + [('amazon', last_year)]:
+            fts_ms, found = self.measure(lambda: search_descriptions(user.pk, text, start=start))
+
+            like = Expense.objects.filter(user=user)
+            for term in text.split():
+                like = like.filter(description__icontains=term)
+            if start is not None:
+                like = like.filter(purchase_date__gte=start)
+            like_ms, _ = self.measure(lambda: list(like.order_by('-purchase_date')[:50]))
+
+            label = text + (f' (desde {start:%m/%Y})' if start else '')
+            self.stdout.write(f'{label:28} {fts_ms:8.1f}ms {like_ms:8.1f}ms {len(found):>11}')
@@ -0,0 +1,119 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, connections, transaction
+from django.db.models import F
+
+from expenses.fields import money
+from expenses.models import Expense, MonthlyLedger, month_bounds
+
+PROFILES = {
+    'padrão (sem ajustes)': {
+        'CONN_MAX_AGE': 0,
+        'CONN_HEALTH_CHECKS': False,
+        'OPTIONS': {'init_command': 'PRAGMA journal_mode=DELETE'},
+    },
+    'settings.DATABASES': {
+        'CONN_MAX_AGE': settings.DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'CONN_HEALTH_CHECKS': settings.DATABASES['default'].get('CONN_HEALTH_CHECKS', False),
+        'OPTIONS': settings.DATABASES['default'].get('OPTIONS', {}),
+    },
+}
+
+
+class Command(BaseCommand):
+    help = "Leituras e escritas concorrentes (threads) numa cópia do banco, com e sem o perfil de produção do SQLite."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+        parser.add_argument('--seconds', type=float, default=3.0)
+        parser.add_argument('--writes', type=float, default=0.2, help="Fração das operações que escrevem.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Este comando só se aplica ao SQLite.')
+
+        with tempfile.TemporaryDirectory() as directory:
+            for label, profile in PROFILES.items():
+                alias = f'bench_{len(connections.settings)}'
+                name = os.path.join(directory, f'{alias}.sqlite3')
+                self.copy_database(name)
+                connections.settings[alias] = {**connections['default'].settings_dict, **profile, 'NAME': name}
+                try:
+                    for threads in options['threads']:
+                        ops, errors, elapsed = self.run(alias, threads, options['seconds'], options['writes'])
+                        self.stdout.write(
+                            f'{label:22} {threads:2d} threads: {ops / elapsed:8.0f} ops/s  '
+                            f'{errors:5d} erros "database is locked"'
+                        )
+                finally:
+                    connections[alias].close()
+
+    def copy_database(self, name):
+        connection.ensure_connection()
+        target = sqlite3.connect(name)
+        with target:
+            connection.connection.backup(target)
+        target.close()
+
+    def run(self, alias, threads, seconds, write_ratio):
+        user_ids = list(Expense.objects.using(alias).values_list('user_id', flat=True).distinct()[:50]) or [1]
+        counters = {'ops': 0, 'errors': 0}
+        lock = threading.Lock()
+        stop = time.perf_counter() + seconds
+
+        def worker(seed):
+            rng = random.Random(seed)
+            ops = errors = 0
+            while time.perf_counter() < stop:
+                # Cada iteração simula uma requisição: com CONN_MAX_AGE=0 a conexão é reaberta.
+                close_old_connections()
+                user_id = rng.choice(user_ids)
+                year, month = 2025, rng.randint(1, 12)
+                try:
+                    if rng.random() < write_ratio:
+                        self.write(alias, user_id, year, month)
+                    else:
+                        self.read(alias, user_id, year, month)
+                    ops += 1
+                except OperationalError:
+                    errors += 1
+            connections[alias].close()
+            with lock:
+                counters['ops'] += ops
+                counters['errors'] += errors
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return counters['ops'], counters['errors'], time.perf_counter() - start
+
+    def read(self, alias, user_id, year, month):
+        first_day, next_month = month_bounds(year, month)
+        list(Expense.objects.using(alias).filter(
+            user_id=user_id, purchase_date__gte=first_day, purchase_date__lt=next_month
+        ).values('description', 'total_amount')[:50])
+        MonthlyLedger.objects.using(alias).filter(user_id=user_id, year=year, month=month).first()
+
+    def write(self, alias, user_id, year, month):
+        # Lê antes de escrever, como Expense.save e MonthlyLedger.for_month fazem.
+        with transaction.atomic(using=alias):
+            MonthlyLedger.objects.using(alias).filter(user_id=user_id, year=year, month=month).first()
+            Expense.objects.using(alias).bulk_create([Expense(
+                description='Benchmark', total_amount=Decimal('10.00'),
+                purchase_date=date(year, month, 1), user_id=user_id
+            )])
+            MonthlyLedger.objects.using(alias).filter(user_id=user_id, year=year, month=month).update(
+                variable_total=F('variable_total') + money(Decimal('10.00'))
+            )
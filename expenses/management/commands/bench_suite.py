@@ -0,0 +1,168 @@
+import json
+import platform
+import sqlite3
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import date
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from expenses.models import Expense, FixedExpense, FixedExpenseOccurrence, Installment, MonthlyLedger, Salary
+
+from .seed_bench import USERNAME_PREFIX
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede latência e número de consultas das telas e gravações principais com os dados atuais "
+        "(gere-os com seed_bench) e grava o resultado em JSON. Com --compare, falha se houver regressão."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help="Arquivo JSON de saída (padrão: saída padrão).")
+        parser.add_argument('--compare', help="JSON de uma execução anterior para comparar.")
+        parser.add_argument('--tolerance', type=float, default=1.5, help="Razão máxima aceita na mediana.")
+
+    def handle(self, *args, **options):
+        user = (
+            User.objects.filter(username__startswith=USERNAME_PREFIX)
+            .annotate(expenses=Count('expense')).order_by('-expenses').first()
+        )
+        if user is None:
+            raise CommandError('Nenhum usuário sintético encontrado; rode `manage.py seed_bench` antes.')
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        self.client = Client()
+        self.client.force_login(user)
+        self.repeat = options['repeat']
+
+        results = {}
+        for name, setup, run in self.scenarios(user):
+            results[name] = self.measure(setup, run)
+            if options['verbosity'] > 1:
+                self.stderr.write(f'{name}: {results[name]}')
+
+        report = {'meta': self.meta(user), 'results': results}
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            self.compare(results, options['compare'], options['tolerance'])
+
+    def scenarios(self, user):
+        latest = Expense.objects.filter(user=user).order_by('-purchase_date').values_list('purchase_date', flat=True).first()
+        period = latest or date.today()
+        balance_url = f'/balance/?month={period.month}&year={period.year}'
+        middle = Expense.objects.filter(user=user).order_by('-purchase_date', '-pk').values_list(
+            'purchase_date', 'pk'
+        )[Expense.objects.filter(user=user).count() // 2]
+        installment_expense = Expense.objects.filter(user=user, is_installment=True).order_by('-pk').first()
+        rule = FixedExpense.objects.filter(user=user).order_by('pk').first()
+
+        def get(url):
+            return lambda: self.client.get(url)
+
+        def edit_expense():
+            expense = Expense.objects.get(pk=installment_expense.pk)
+            expense.total_amount += Decimal('1.00')
+            expense.save()
+
+        def create_expense():
+            Expense(description='Benchmark', total_amount=Decimal('1200.00'), purchase_date=period,
+                    is_installment=True, installments_number=12, user=user).save()
+
+        def edit_fixed_expense():
+            fixed_expense = FixedExpense.objects.get(pk=rule.pk)
+            fixed_expense.monthly_amount += Decimal('1.00')
+            fixed_expense.save()
+
+        return [
+            ('monthly_balance_cold', cache.clear, get(balance_url)),
+            ('monthly_balance_warm', None, get(balance_url)),
+            ('expense_list_first_page', None, get('/expenses/')),
+            ('expense_list_middle_page', None, get(f'/expenses/?after={middle[0].isoformat()}_{middle[1]}')),
+            ('fixed_expense_list', None, get('/fixed-expenses/')),
+            ('expense_save_create', None, self.rolled_back(create_expense)),
+            ('expense_save_edit_amount', None, self.rolled_back(edit_expense) if installment_expense else None),
+            ('fixed_expense_save_edit_amount', None, self.rolled_back(edit_fixed_expense) if rule else None),
+        ]
+
+    @staticmethod
+    def rolled_back(run):
+        def wrapper():
+            with transaction.atomic():
+                run()
+                transaction.set_rollback(True)
+        return wrapper
+
+    def measure(self, setup, run):
+        if run is None:
+            return None
+        timings = []
+        queries = 0
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                start = time.perf_counter()
+                response = run()
+                timings.append((time.perf_counter() - start) * 1000)
+            if response is not None and response.status_code != 200:
+                raise CommandError(f'Status {response.status_code} ao medir {response.request["PATH_INFO"]}.')
+            queries = sum(len(capture.captured_queries) for capture in captured)
+        timings.sort()
+        return {
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'min_ms': round(timings[0], 3),
+            'queries': queries,
+        }
+
+    def meta(self, user):
+        return {
+            'date': date.today().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'repeat': self.repeat,
+            'rows': {
+                model._meta.model_name: model.objects.count()
+                for model in (Expense, Installment, FixedExpense, FixedExpenseOccurrence, Salary, MonthlyLedger)
+            },
+            'user_rows': {
+                'expense': Expense.objects.filter(user=user).count(),
+                'installment': Installment.objects.filter(user=user).count(),
+                'fixedexpense': FixedExpense.objects.filter(user=user).count(),
+            },
+        }
+
+    def compare(self, results, path, tolerance):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if not result or not before:
+                continue
+            if result['queries'] > before['queries']:
+                regressions.append(f'{name}: {before["queries"]} -> {result["queries"]} consultas')
+            if result['p50_ms'] > before['p50_ms'] * tolerance:
+                regressions.append(f'{name}: mediana {before["p50_ms"]} -> {result["p50_ms"]} ms')
+        if regressions:
+            raise CommandError('Regressões encontradas:\n  ' + '\n  '.join(regressions))
+        self.stderr.write(self.style.SUCCESS(f'Nenhuma regressão em relação a {path}.'))
@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.importers import EXPENSE_SIGNS, PARSERS, import_expenses
+
+
+class Command(BaseCommand):
+    help = "Importa despesas de um extrato bancário CSV ou OFX, em lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help="Nome do usuário dono das despesas.")
+        parser.add_argument('--format', choices=sorted(PARSERS), help="Padrão: deduzido pela extensão do arquivo.")
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument(
+            '--expense-sign', choices=EXPENSE_SIGNS, default='negative',
+            help="Sinal das despesas no CSV; as linhas com o sinal contrário (créditos) são ignoradas. Padrão: negative.",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário "{options["user"]}" não encontrado.')
+
+        path = options['path']
+        file_format = options['format'] or ('ofx' if path.lower().endswith('.ofx') else 'csv')
+
+        def progress(result):
+            self.stdout.write(
+                f'{result.processed} linhas processadas, {result.created} despesas criadas '
+                f'({result.rows_per_second:.0f} linhas/s)'
+            )
+
+        with open(path, encoding=options['encoding'], errors='replace', newline='') as stream:
+            result = import_expenses(
+                stream, user, file_format, options['batch_size'], progress, options['expense_sign']
+            )
+
+        for line_number, message in result.errors:
+            self.stderr.write(f'Linha {line_number}: {message}')
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... e mais {result.failed - len(result.errors)} linhas com erro.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} despesas importadas, {result.failed} linhas rejeitadas, '
+            f'{result.elapsed:.2f}s ({result.rows_per_second:.0f} linhas/s).'
+        ))
@@ -0,0 +1,169 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from expenses.models import (
+    CategoryRollup, Expense, Installment, FixedExpense, FixedExpenseOccurrence, Salary, MonthlyLedger
+)
+
+
+def computed_ledgers(user_id=None, periods=()):
+    totals = defaultdict(lambda: dict.fromkeys(MonthlyLedger.TOTAL_FIELDS, Decimal('0.00')))
+    scope = {'user_id': user_id} if user_id else {}
+    for key in periods:
+        totals[key]
+
+    for row in Salary.objects.filter(**scope).values('user_id', 'year', 'amount'):
+        for month in range(1, 13):
+            totals[(row['user_id'], row['year'], month)]['salary'] = row['amount']
+
+    sources = (
+        ('variable_total', Expense.objects.filter(is_installment=False, **scope).values(
+            'user_id', year=ExtractYear('purchase_date'), month=ExtractMonth('purchase_date')
+        ).annotate(total=Sum('total_amount'))),
+        ('installment_total', Installment.objects.filter(**scope).values(
+            'user_id', 'year', 'month'
+        ).annotate(total=Sum('installment_amount'))),
+    )
+    for field, rows in sources:
+        for row in rows.order_by():
+            totals[(row['user_id'], row['year'], row['month'])][field] = row['total']
+
+    # Gastos fixos sem término são expandidos até o último mês conhecido do usuário (ou o mês atual),
+    # contando também o último mês das regras com término.
+    rules = list(FixedExpense.objects.filter(**scope))
+    horizon = defaultdict(lambda: date.today().replace(day=1))
+    for u, y, m in list(totals):
+        horizon[u] = max(horizon[u], date(y, m, 1))
+    for rule in rules:
+        if rule.end_date is not None:
+            horizon[rule.user_id] = max(horizon[rule.user_id], rule.end_date.replace(day=1))
+    overrides = {
+        (o['fixed_expense_id'], o['year'], o['month']): o['amount']
+        for o in FixedExpenseOccurrence.objects.filter(**scope).values('fixed_expense_id', 'year', 'month', 'amount')
+    }
+    for rule in rules:
+        last_day = rule.end_date or horizon[rule.user_id]
+        for year, month in rule.periods(rule.start_date, last_day):
+            amount = overrides.get((rule.pk, year, month), rule.monthly_amount)
+            totals[(rule.user_id, year, month)]['fixed_total'] += amount
+    return totals
+
+
+def computed_rollups(user_id=None, periods=()):
+    """Totais por (usuário, ano, mês, categoria), só para os meses que têm resumo mensal."""
+    periods = set(periods)
+    totals = defaultdict(Decimal)
+    scope = {'user_id': user_id} if user_id else {}
+
+    sources = (
+        Expense.objects.filter(is_installment=False, category__isnull=False, **scope).values(
+            'user_id', 'category_id', year=ExtractYear('purchase_date'), month=ExtractMonth('purchase_date')
+        ).annotate(total=Sum('total_amount')),
+        Installment.objects.filter(expense__category__isnull=False, **scope).values(
+            'user_id', 'year', 'month', category_id=F('expense__category_id')
+        ).annotate(total=Sum('installment_amount')),
+    )
+    for rows in sources:
+        for row in rows.order_by():
+            totals[(row['user_id'], row['year'], row['month'], row['category_id'])] += row['total']
+
+    horizon = {}
+    for u, y, m in periods:
+        horizon[u] = max(horizon.get(u, date(y, m, 1)), date(y, m, 1))
+    overrides = {
+        (o['fixed_expense_id'], o['year'], o['month']): o['amount']
+        for o in FixedExpenseOccurrence.objects.filter(**scope).values('fixed_expense_id', 'year', 'month', 'amount')
+    }
+    for rule in FixedExpense.objects.filter(category__isnull=False, user_id__in=horizon, **scope).iterator():
+        last_day = rule.end_date or horizon[rule.user_id]
+        for year, month in rule.periods(rule.start_date, last_day):
+            amount = overrides.get((rule.pk, year, month), rule.monthly_amount)
+            totals[(rule.user_id, year, month, rule.category_id)] += amount
+    return {key: total for key, total in totals.items() if total and key[:3] in periods}
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói a tabela de resumos mensais (e os totais por categoria) a partir das despesas, "
+        "parcelas, gastos fixos e salários."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help="Restringe a um usuário (id).")
+        parser.add_argument('--verify', action='store_true', help="Apenas compara os resumos salvos com os valores recalculados.")
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+        ledgers = MonthlyLedger.objects.all()
+        if user_id:
+            ledgers = ledgers.filter(user_id=user_id)
+        periods = list(ledgers.values_list('user_id', 'year', 'month'))
+        totals = computed_ledgers(user_id, periods)
+
+        if options['verify']:
+            self.verify(totals, computed_rollups(user_id, periods), user_id)
+            return
+
+        rollups = computed_rollups(user_id, totals)
+
+        with transaction.atomic():
+            ledgers.delete()
+            CategoryRollup.objects.filter(**({'user_id': user_id} if user_id else {})).delete()
+            MonthlyLedger.objects.bulk_create(
+                (MonthlyLedger(user_id=u, year=y, month=m, **values) for (u, y, m), values in totals.items()),
+                batch_size=500
+            )
+            CategoryRollup.objects.bulk_create(
+                (CategoryRollup(user_id=u, year=y, month=m, category_id=c, total=total) for (u, y, m, c), total in rollups.items()),
+                batch_size=500
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(totals)} resumos mensais e {len(rollups)} totais por categoria reconstruídos.'
+        ))
+        self.verify(totals, rollups, user_id)
+
+    def verify(self, totals, rollups, user_id):
+        ledgers = MonthlyLedger.objects.all()
+        stored_rollups = CategoryRollup.objects.all()
+        if user_id:
+            ledgers = ledgers.filter(user_id=user_id)
+            stored_rollups = stored_rollups.filter(user_id=user_id)
+
+        mismatches = 0
+        checked = 0
+        for ledger in ledgers.iterator():
+            checked += 1
+            expected = totals[(ledger.user_id, ledger.year, ledger.month)]
+            for field in MonthlyLedger.TOTAL_FIELDS:
+                wanted = expected[field]
+                if getattr(ledger, field) != wanted:
+                    mismatches += 1
+                    self.stderr.write(
+                        f'Usuário {ledger.user_id} {ledger.month:02d}/{ledger.year}: '
+                        f'{field} = {getattr(ledger, field)}, esperado {wanted}'
+                    )
+
+        # Linhas zeradas equivalem a linhas ausentes: a categoria não teve gasto no mês.
+        stored = {
+            (u, y, m, c): total
+            for u, y, m, c, total in stored_rollups.values_list('user_id', 'year', 'month', 'category_id', 'total').iterator()
+            if total
+        }
+        for key in sorted(stored.keys() | rollups.keys()):
+            found, wanted = stored.get(key, Decimal('0.00')), rollups.get(key, Decimal('0.00'))
+            if found != wanted:
+                mismatches += 1
+                u, y, m, c = key
+                self.stderr.write(f'Usuário {u} {m:02d}/{y}: categoria {c} = {found}, esperado {wanted}')
+
+        if mismatches:
+            raise CommandError(f'{mismatches} divergências encontradas em {checked} resumos mensais.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{checked} resumos mensais e {len(stored)} totais por categoria conferidos, nenhuma divergência.'
+        ))
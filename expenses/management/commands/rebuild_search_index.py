@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from expenses.search import INDEXES, install_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Recria os índices de busca (FTS5) das descrições e seus gatilhos a partir das tabelas. "
+        "Rode depois de migrações que recriam as tabelas de despesas ou se a busca ficar inconsistente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--optimize', action='store_true', help="Compacta os índices depois de reconstruir.")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            install_search_index(cursor)
+            if options['optimize']:
+                for index, _ in INDEXES:
+                    cursor.execute(f"INSERT INTO {index}({index}) VALUES ('optimize')")
+            counts = []
+            for index, table in INDEXES:
+                cursor.execute(f'SELECT count(*) FROM {table}')
+                counts.append(f'{table}: {cursor.fetchone()[0]}')
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(self.style.SUCCESS(f'Índices de busca reconstruídos em {elapsed:.0f} ms ({", ".join(counts)}).'))
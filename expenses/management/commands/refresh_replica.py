@@ -0,0 +1,43 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from expenses.routers import REPLICA, mark_replica_refreshed
+
+
+def refresh_replica(source='default'):
+    started = time.time()
+    connection = connections[source]
+    connection.ensure_connection()
+    target = sqlite3.connect(settings.DATABASES[REPLICA]['NAME'], timeout=60)
+    try:
+        # Cópia em um único passo: um retrato consistente do principal (no WAL, sem bloquear escritas);
+        # leitores da réplica esperam (busy timeout) só durante a cópia.
+        connection.connection.backup(target)
+    finally:
+        target.close()
+    mark_replica_refreshed(started)
+    return time.time() - started
+
+
+class Command(BaseCommand):
+    help = "Atualiza a réplica de leitura (relatórios) com uma cópia do banco principal via API de backup do SQLite."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, help="Repete a cópia a cada N segundos.")
+
+    def handle(self, *args, **options):
+        if REPLICA not in settings.DATABASES:
+            raise CommandError(f"Configure DATABASES['{REPLICA}'] para usar a réplica.")
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Este comando só se aplica ao SQLite.')
+
+        while True:
+            elapsed = refresh_replica()
+            self.stdout.write(f'Réplica atualizada em {elapsed * 1000:.0f} ms.')
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,106 @@
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from dateutil.relativedelta import relativedelta
+
+from expenses.models import Expense, FixedExpense, FixedExpenseOccurrence, Salary
+
+USERNAME_PREFIX = 'bench_user_'
+
+DESCRIPTIONS = (
+    'Mercado', 'Farmácia', 'Restaurante', 'Combustível', 'Padaria', 'Roupas', 'Eletrônicos',
+    'Cinema', 'Aplicativo de transporte', 'Presente', 'Pet shop', 'Material escolar',
+)
+FIXED_DESCRIPTIONS = (
+    'Aluguel', 'Condomínio', 'Internet', 'Energia', 'Água', 'Plano de saúde', 'Academia',
+    'Streaming', 'Celular', 'Escola', 'Seguro do carro', 'Assinatura de jornal',
+)
+
+
+def money(value):
+    return Decimal(str(round(value, 2)))
+
+
+def seed_user(user, expenses, rng, today, batch_size=1000):
+    first_year = today.year - 3
+    Salary.objects.bulk_create(
+        Salary(user=user, year=year, amount=money(rng.lognormvariate(8.4, 0.4)))
+        for year in range(first_year, today.year + 2)
+    )
+
+    rules = FixedExpense.objects.bulk_create(
+        FixedExpense(
+            user=user,
+            description=description,
+            monthly_amount=money(rng.lognormvariate(5.0, 0.8)),
+            start_date=date(first_year, 1, 1) + timedelta(days=rng.randrange(365 * 3)),
+            end_date=None if rng.random() < 0.7 else today + timedelta(days=rng.randrange(30, 730)),
+        )
+        for description in rng.sample(FIXED_DESCRIPTIONS, rng.randint(4, len(FIXED_DESCRIPTIONS)))
+    )
+    overrides = []
+    for rule in rules:
+        # Contas de consumo variam em alguns meses.
+        for months_ahead in rng.sample(range(24), rng.randint(0, 4)):
+            period = rule.start_date + relativedelta(months=months_ahead)
+            if rule.covers(period.year, period.month):
+                override = rule.build_occurrence(period.year, period.month)
+                override.amount = money(float(rule.monthly_amount) * rng.uniform(0.7, 1.4))
+                overrides.append(override)
+    FixedExpenseOccurrence.objects.bulk_create(overrides)
+
+    days = (today - date(first_year, 1, 1)).days
+
+    def generate():
+        for _ in range(expenses):
+            installments = rng.choice((2, 3, 4, 6, 10, 12, 18, 24)) if rng.random() < 0.3 else 1
+            yield Expense(
+                user=user,
+                description=rng.choice(DESCRIPTIONS),
+                total_amount=money(rng.lognormvariate(4.2 if installments == 1 else 6.5, 0.9)),
+                purchase_date=date(first_year, 1, 1) + timedelta(days=rng.randrange(days)),
+                is_installment=installments > 1,
+                installments_number=installments,
+            )
+    Expense.objects.bulk_create_with_installments(generate(), batch_size=batch_size)
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera usuários sintéticos (bench_user_N) com despesas, parcelas, gastos fixos e salários. "
+        "Ex.: --users 10 --expenses 100 (~1 mil linhas), --users 100 --expenses 1000 (~100 mil), "
+        "--users 200 --expenses 5000 (~1 milhão, contando parcelas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--expenses', type=int, default=100, help="Despesas por usuário.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true', help="Remove os usuários sintéticos existentes antes.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = date.today()
+        start = time.perf_counter()
+
+        if options['clear']:
+            deleted, _ = User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            self.stdout.write(f'{deleted} linhas sintéticas removidas.')
+
+        existing = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        for index in range(existing, existing + options['users']):
+            with transaction.atomic():
+                user = User.objects.create(username=f'{USERNAME_PREFIX}{index}')
+                seed_user(user, options['expenses'], rng, today)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {user.username}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{options["users"]} usuários com {options["expenses"]} despesas cada '
+            f'gerados em {time.perf_counter() - start:.1f}s.'
+        ))
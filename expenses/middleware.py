@@ -0,0 +1,74 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .timing import finish_request, start_request
+
+timing_logger = logging.getLogger('expenses.timing')
+
+
+class ServerTimingMiddleware:
+    """Mede consultas SQL, renderização de template e tempo total de cada requisição e os devolve
+    no cabeçalho Server-Timing e no log 'expenses.timing'. Desligado com SERVER_TIMING = False."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'SERVER_TIMING_SLOW_MS', 500)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = start_request()
+        request.timings = timings
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = start_request()
+        request.timings = timings
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        return self.report(request, response, timings)
+
+    def process_template_response(self, request, response):
+        request.timings.template_started()
+        response.add_post_render_callback(request.timings.template_finished)
+        return response
+
+    def report(self, request, response, timings):
+        total_ms = timings.total_ms()
+        slowest_sql, slowest_ms = timings.slowest
+        metrics = [
+            f'db;dur={timings.db_ms:.1f};desc="{len(timings.queries)} consultas"',
+            f'db-slowest;dur={slowest_ms:.1f}',
+        ]
+        if timings.template_ms is not None:
+            metrics.append(f'tpl;dur={timings.template_ms:.1f}')
+        metrics.append(f'total;dur={total_ms:.1f}')
+        response['Server-Timing'] = ', '.join(metrics)
+
+        line = (
+            f'method={request.method} path={request.path} status={response.status_code} '
+            f'total_ms={total_ms:.1f} db_ms={timings.db_ms:.1f} queries={len(timings.queries)} '
+            f'slowest_ms={slowest_ms:.1f} template_ms={timings.template_ms or 0:.1f}'
+        )
+        if total_ms >= self.slow_ms:
+            queries = '\n'.join(f'  {duration:8.1f} ms  {sql}' for sql, duration in timings.queries)
+            timing_logger.warning('slow %s\n%s', line, queries)
+        else:
+            timing_logger.info(line)
+        return response
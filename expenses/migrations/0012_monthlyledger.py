@@ -0,0 +1,35 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0011_delete_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveIntegerField()),
+                ('salary', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('variable_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('installment_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('fixed_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal',
+                'verbose_name_plural': 'Resumos Mensais',
+                'unique_together': {('user', 'year', 'month')},
+            },
+        ),
+    ]
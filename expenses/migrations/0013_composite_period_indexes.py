@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0012_monthlyledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'purchase_date'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedexpenseoccurrence',
+            index=models.Index(fields=['user', 'year', 'month'], name='occurrence_user_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['user', 'year', 'month'], name='installment_user_period_idx'),
+        ),
+    ]
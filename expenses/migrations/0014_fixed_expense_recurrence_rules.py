@@ -0,0 +1,67 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:12
+
+from django.conf import settings
+from dateutil.relativedelta import relativedelta
+from django.db import migrations, models
+
+
+def occurrences_to_rules(apps, schema_editor):
+    FixedExpense = apps.get_model('expenses', 'FixedExpense')
+    FixedExpenseOccurrence = apps.get_model('expenses', 'FixedExpenseOccurrence')
+    for fixed_expense in FixedExpense.objects.all().iterator():
+        fixed_expense.end_date = fixed_expense.start_date + relativedelta(months=11)
+        fixed_expense.save(update_fields=['end_date'])
+        FixedExpenseOccurrence.objects.filter(
+            fixed_expense=fixed_expense, amount=fixed_expense.monthly_amount
+        ).delete()
+
+
+def rules_to_occurrences(apps, schema_editor):
+    FixedExpense = apps.get_model('expenses', 'FixedExpense')
+    FixedExpenseOccurrence = apps.get_model('expenses', 'FixedExpenseOccurrence')
+    for fixed_expense in FixedExpense.objects.all().iterator():
+        existing = set(fixed_expense.occurrences.values_list('year', 'month'))
+        occurrences = []
+        for i in range(12):
+            occurrence_date = fixed_expense.start_date + relativedelta(months=i)
+            if (occurrence_date.year, occurrence_date.month) in existing:
+                continue
+            occurrences.append(FixedExpenseOccurrence(
+                fixed_expense=fixed_expense,
+                amount=fixed_expense.monthly_amount,
+                occurrence_date=occurrence_date,
+                month=occurrence_date.month,
+                year=occurrence_date.year,
+                user_id=fixed_expense.user_id
+            ))
+        FixedExpenseOccurrence.objects.bulk_create(occurrences)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0013_composite_period_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fixedexpense',
+            name='end_date',
+            field=models.DateField(blank=True, null=True, verbose_name='Data de Término (Último Mês)'),
+        ),
+        migrations.RunPython(occurrences_to_rules, rules_to_occurrences),
+        migrations.AlterField(
+            model_name='fixedexpenseoccurrence',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Valor neste Mês'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='fixedexpenseoccurrence',
+            unique_together={('fixed_expense', 'year', 'month')},
+        ),
+        migrations.AddIndex(
+            model_name='fixedexpense',
+            index=models.Index(fields=['user', 'start_date'], name='fixedexpense_user_start_idx'),
+        ),
+    ]
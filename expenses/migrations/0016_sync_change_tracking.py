@@ -0,0 +1,83 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0015_idempotency_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=30)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registro de Exclusão',
+                'verbose_name_plural': 'Registros de Exclusão',
+            },
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddField(
+            model_name='fixedexpense',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddField(
+            model_name='fixedexpenseoccurrence',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='installment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='salary',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Atualizado em'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'updated_at'], name='expense_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedexpense',
+            index=models.Index(fields=['user', 'updated_at'], name='fixedexpense_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fixedexpenseoccurrence',
+            index=models.Index(fields=['user', 'updated_at'], name='occurrence_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='installment',
+            index=models.Index(fields=['user', 'updated_at'], name='installment_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salary',
+            index=models.Index(fields=['user', 'updated_at'], name='salary_user_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.1 on 2026-10-18 17:50
+
+import expenses.fields
+from decimal import Decimal
+from django.db import migrations
+
+MONEY_FIELDS = {
+    'expense': ('total_amount',),
+    'fixedexpense': ('monthly_amount',),
+    'fixedexpenseoccurrence': ('amount',),
+    'installment': ('installment_amount',),
+    'monthlyledger': ('salary', 'variable_total', 'installment_total', 'fixed_total'),
+    'salary': ('amount',),
+}
+
+
+def _convert(apps, schema_editor, expression):
+    # Um UPDATE por tabela direto no banco: passar linha a linha pelo ORM levaria minutos.
+    quote = schema_editor.quote_name
+    for model_name, fields in MONEY_FIELDS.items():
+        table = quote(apps.get_model('expenses', model_name)._meta.db_table)
+        assignments = ', '.join(f'{quote(field)} = {expression.format(quote(field))}' for field in fields)
+        schema_editor.execute(f'UPDATE {table} SET {assignments}')
+
+
+def decimals_to_cents(apps, schema_editor):
+    _convert(apps, schema_editor, 'CAST(ROUND({} * 100) AS INTEGER)')
+
+
+def cents_to_decimals(apps, schema_editor):
+    _convert(apps, schema_editor, '{} / 100.0')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0016_sync_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='expense',
+            name='total_amount',
+            field=expenses.fields.MoneyField(verbose_name='Valor Total'),
+        ),
+        migrations.AlterField(
+            model_name='fixedexpense',
+            name='monthly_amount',
+            field=expenses.fields.MoneyField(verbose_name='Valor Mensal Fixo'),
+        ),
+        migrations.AlterField(
+            model_name='fixedexpenseoccurrence',
+            name='amount',
+            field=expenses.fields.MoneyField(verbose_name='Valor neste Mês'),
+        ),
+        migrations.AlterField(
+            model_name='installment',
+            name='installment_amount',
+            field=expenses.fields.MoneyField(),
+        ),
+        migrations.AlterField(
+            model_name='monthlyledger',
+            name='fixed_total',
+            field=expenses.fields.MoneyField(default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='monthlyledger',
+            name='installment_total',
+            field=expenses.fields.MoneyField(default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='monthlyledger',
+            name='salary',
+            field=expenses.fields.MoneyField(default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='monthlyledger',
+            name='variable_total',
+            field=expenses.fields.MoneyField(default=Decimal('0.00'), max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='salary',
+            name='amount',
+            field=expenses.fields.MoneyField(verbose_name='Salário Mensal (para o ano todo)'),
+        ),
+        migrations.RunPython(decimals_to_cents, cents_to_decimals),
+    ]
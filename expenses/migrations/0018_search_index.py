@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from expenses.search import install_search_index
+
+    with schema_editor.connection.cursor() as cursor:
+        install_search_index(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    from expenses.search import drop_statements
+
+    for statement in drop_statements():
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0017_money_in_cents'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
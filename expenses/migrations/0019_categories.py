@@ -0,0 +1,73 @@
+# Generated by Django 5.2.1 on 2026-10-18 18:02
+
+import django.db.models.deletion
+import expenses.fields
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0018_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Nome')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Categoria',
+                'verbose_name_plural': 'Categorias',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='expenses.category', verbose_name='Categoria'),
+        ),
+        migrations.AddField(
+            model_name='fixedexpense',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='expenses.category', verbose_name='Categoria'),
+        ),
+        migrations.CreateModel(
+            name='CategoryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveIntegerField()),
+                ('total', expenses.fields.MoneyField(default=Decimal('0.00'), max_digits=12)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='expenses.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Total Mensal por Categoria',
+                'verbose_name_plural': 'Totais Mensais por Categoria',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['user', 'updated_at'], name='category_user_updated_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='category',
+            unique_together={('user', 'name')},
+        ),
+        migrations.AddIndex(
+            model_name='categoryrollup',
+            index=models.Index(fields=['user', 'year', 'month'], name='rollup_user_period_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='categoryrollup',
+            unique_together={('user', 'category', 'year', 'month')},
+        ),
+    ]
@@ -1,109 +1,531 @@
-from django.db import models
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.db import models, transaction, router, IntegrityError
+from django.db.models import F, Q, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from decimal import Decimal
+from datetime import date
 from dateutil.relativedelta import relativedelta
 from django.contrib.auth.models import User
+from .fields import MoneyField, from_cents, money, to_cents
+
+
+def month_bounds(year, month):
+    first_day = date(year, month, 1)
+    return first_day, first_day + relativedelta(months=1)
+
+
+def months_between(start, end):
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+def period_q(first_day, last_day=None):
+    condition = Q(year__gt=first_day.year) | Q(year=first_day.year, month__gte=first_day.month)
+    if last_day is not None:
+        condition &= Q(year__lt=last_day.year) | Q(year=last_day.year, month__lte=last_day.month)
+    return condition
+
+
+def merge_deltas(*deltas):
+    merged = defaultdict(lambda: defaultdict(Decimal))
+    for delta in deltas:
+        for period, changes in delta.items():
+            for field, value in changes.items():
+                merged[period][field] += value
+    return merged
+
+
+def record_deletions(model, rows):
+    Tombstone.objects.bulk_create([
+        Tombstone(user_id=user_id, object_type=model.SYNC_TYPE, object_id=pk) for pk, user_id in rows
+    ], batch_size=500)
+
+
+def delete_tracked(queryset):
+    """Apaga as linhas do queryset deixando uma lápide para cada uma, para a sincronização avisar os clientes."""
+    record_deletions(queryset.model, queryset.values_list('pk', 'user_id'))
+    return queryset.delete()
+
+
+class SalaryQuerySet(models.QuerySet):
+    def bulk_create_with_ledger(self, salaries, batch_size=500):
+        with transaction.atomic():
+            salaries = self.bulk_create(salaries, batch_size=batch_size)
+            deltas = defaultdict(list)
+            for salary in salaries:
+                deltas[salary.user_id].append(salary.ledger_deltas())
+            for user_id, user_deltas in deltas.items():
+                MonthlyLedger.adjust(user_id, merge_deltas(*user_deltas))
+        return salaries
 
 
 class Salary(models.Model):
-    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Salário Mensal (para o ano todo)")
+    amount = MoneyField(verbose_name="Salário Mensal (para o ano todo)")
     year = models.PositiveIntegerField(verbose_name="Ano")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    objects = SalaryQuerySet.as_manager()
+
+    SYNC_TYPE = 'salary'
     
     class Meta:
         unique_together = ('user', 'year')  
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='salary_user_updated_idx'),
+        ]
         verbose_name = "Salário"
         verbose_name_plural = "Salários"
 
     def __str__(self):
         return f'Salário mensal de {self.amount} para o ano {self.year}'
 
+    def ledger_deltas(self, sign=1):
+        return {(self.year, month): {'salary': sign * self.amount} for month in range(1, 13)}
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            old_deltas = {}
+            if self.pk is not None:
+                old_instance = Salary.objects.filter(pk=self.pk).first()
+                if old_instance:
+                    old_deltas = old_instance.ledger_deltas(-1)
+            super().save(*args, **kwargs)
+            MonthlyLedger.adjust(self.user_id, merge_deltas(old_deltas, self.ledger_deltas()))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            MonthlyLedger.adjust(self.user_id, self.ledger_deltas(-1))
+            record_deletions(Salary, [(self.pk, self.user_id)])
+            return super().delete(*args, **kwargs)
+
+class Category(models.Model):
+    name = models.CharField(max_length=50, verbose_name="Nome")
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    SYNC_TYPE = 'category'
+
+    class Meta:
+        ordering = ['name']
+        unique_together = ('user', 'name')
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='category_user_updated_idx'),
+        ]
+        verbose_name = "Categoria"
+        verbose_name_plural = "Categorias"
+
+    def __str__(self):
+        return self.name
+
+    def delete(self, *args, **kwargs):
+        # "Sem categoria" é calculado por diferença com o resumo mensal: basta soltar as despesas
+        # (marcando a alteração para a sincronização) e apagar os totais da categoria junto com ela.
+        with transaction.atomic():
+            now = timezone.now()
+            Expense.objects.filter(category=self).update(category=None, updated_at=now)
+            FixedExpense.objects.filter(category=self).update(category=None, updated_at=now)
+            record_deletions(Category, [(self.pk, self.user_id)])
+            return super().delete(*args, **kwargs)
+
+
+class ExpenseQuerySet(models.QuerySet):
+    def bulk_create_with_installments(self, expenses, batch_size=500):
+        created = []
+        batch = []
+        with transaction.atomic():
+            for expense in expenses:
+                batch.append(expense)
+                if len(batch) >= batch_size:
+                    created.extend(self._create_batch(batch))
+                    batch = []
+            if batch:
+                created.extend(self._create_batch(batch))
+        return created
+
+    def _create_batch(self, expenses):
+        expenses = self.bulk_create(expenses)
+        installments = []
+        deltas = defaultdict(list)
+        category_deltas = defaultdict(list)
+        for expense in expenses:
+            schedule = expense.build_installments() if expense.creates_installments else None
+            if schedule:
+                installments.extend(schedule)
+            expense_deltas = expense.ledger_deltas(installments=schedule)
+            deltas[expense.user_id].append(expense_deltas)
+            if expense.category_id is not None:
+                category_deltas[(expense.user_id, expense.category_id)].append(expense_deltas)
+            expense._remember_schedule()
+        Installment.objects.bulk_create(installments)
+        for user_id, user_deltas in deltas.items():
+            MonthlyLedger.adjust(user_id, merge_deltas(*user_deltas))
+        for (user_id, category_id), grouped in category_deltas.items():
+            CategoryRollup.adjust(user_id, category_id, merge_deltas(*grouped))
+        return expenses
+
+
 class Expense(models.Model):
     description = models.CharField(max_length=255, verbose_name="Descrição")
-    total_amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valor Total")
+    total_amount = MoneyField(verbose_name="Valor Total")
     purchase_date = models.DateField(default=timezone.now, verbose_name="Data da Compra")
     is_installment = models.BooleanField(default=False, verbose_name="É Parcelado?")
     installments_number = models.PositiveIntegerField(null=True, blank=True, verbose_name="Número de Parcelas")
+    category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.SET_NULL, verbose_name="Categoria")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    objects = ExpenseQuerySet.as_manager()
+
+    SYNC_TYPE = 'expense'
+    SCHEDULE_FIELDS = ('total_amount', 'purchase_date', 'is_installment', 'installments_number', 'user_id')
+    TRACKED_FIELDS = SCHEDULE_FIELDS + ('category_id',)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'purchase_date'], name='expense_user_date_idx'),
+            models.Index(fields=['user', 'updated_at'], name='expense_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.description} - R$ {self.total_amount}'
 
+    @property
+    def creates_installments(self):
+        return bool(self.is_installment and self.installments_number and self.installments_number > 0)
+
+    def build_installments(self):
+        # Divisão em centavos: o que sobra vai para a última parcela, e a soma fecha com o total.
+        base, remainder = divmod(to_cents(self.total_amount), self.installments_number)
+        installments = []
+        for i in range(self.installments_number):
+            due_date = self.purchase_date + relativedelta(months=i)
+            last = i == self.installments_number - 1
+            installments.append(Installment(
+                expense=self,
+                installment_amount=from_cents(base + remainder if last else base),
+                due_date=due_date,
+                month=due_date.month,
+                year=due_date.year,
+                user_id=self.user_id
+            ))
+        return installments
+
+    def ledger_deltas(self, sign=1, installments=None):
+        if not self.is_installment:
+            month = (self.purchase_date.year, self.purchase_date.month)
+            return {month: {'variable_total': sign * Decimal(self.total_amount)}}
+        if not self.creates_installments:
+            return {}
+        return merge_deltas(*(
+            {(i.year, i.month): {'installment_total': sign * i.installment_amount}}
+            for i in installments or self.build_installments()
+        ))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_schedule()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_schedule()
+
+    def _remember_schedule(self):
+        # Valores carregados do banco, para comparar no save() sem reler a linha.
+        self._loaded_values = {field: self.__dict__[field] for field in self.TRACKED_FIELDS if field in self.__dict__}
+
+    def _previous_state(self):
+        loaded = getattr(self, '_loaded_values', {})
+        if len(loaded) < len(self.TRACKED_FIELDS):
+            # Instância montada à mão ou com campos adiados: busca só o necessário.
+            loaded = Expense.objects.filter(pk=self.pk).values(*self.TRACKED_FIELDS).first()
+            if loaded is None:
+                return None
+        return Expense(pk=self.pk, **loaded)
+
+    def sync_installments(self, previous):
+        existing = Installment.objects.filter(expense_id=self.pk)
+        if previous is None or not previous.creates_installments:
+            if self.creates_installments:
+                Installment.objects.bulk_create(self.build_installments())
+            return
+        if not self.creates_installments or previous.user_id != self.user_id:
+            delete_tracked(existing)
+            Installment.objects.bulk_create(self.build_installments() if self.creates_installments else [])
+            return
+
+        wanted = self.build_installments()
+        kept = min(previous.installments_number, self.installments_number)
+        if previous.purchase_date == self.purchase_date:
+            # Mesmas datas: as parcelas mantidas só podem mudar de valor, que é igual em todas.
+            if previous.installments_number > kept:
+                delete_tracked(existing.filter(due_date__gte=self.purchase_date + relativedelta(months=kept)))
+            if previous.total_amount != self.total_amount or previous.installments_number != self.installments_number:
+                now = timezone.now()
+                existing.update(installment_amount=wanted[0].installment_amount, updated_at=now)
+                final = wanted[-1]
+                if kept == self.installments_number and final.installment_amount != wanted[0].installment_amount:
+                    existing.filter(due_date=final.due_date).update(installment_amount=final.installment_amount, updated_at=now)
+            Installment.objects.bulk_create(wanted[kept:])
+            return
+
+        rows = list(existing.order_by('due_date', 'pk'))
+        fields = set()
+        for row, target in zip(rows, wanted):
+            for field in ('installment_amount', 'due_date', 'month', 'year'):
+                if getattr(row, field) != getattr(target, field):
+                    setattr(row, field, getattr(target, field))
+                    fields.add(field)
+        if fields:
+            # bulk_update não passa pelo auto_now: a data de alteração vai junto explicitamente.
+            now = timezone.now()
+            for row in rows[:kept]:
+                row.updated_at = now
+            Installment.objects.bulk_update(rows[:kept], sorted(fields | {'updated_at'}), batch_size=500)
+        if len(rows) > kept:
+            delete_tracked(existing.filter(pk__in=[row.pk for row in rows[kept:]]))
+        Installment.objects.bulk_create(wanted[len(rows):])
+
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        creating_installments = self.is_installment and self.installments_number and self.installments_number > 0
-        
-        if not is_new:
-             old_instance = Expense.objects.get(pk=self.pk)
-             if old_instance.is_installment and not self.is_installment:
-                 Installment.objects.filter(expense=self).delete()
-             elif not old_instance.is_installment and self.is_installment:
-                 is_new = True 
-             elif old_instance.is_installment and self.is_installment and \
-                  (old_instance.total_amount != self.total_amount or old_instance.installments_number != self.installments_number or old_instance.purchase_date != self.purchase_date):
-                 Installment.objects.filter(expense=self).delete()
-                 is_new = True 
-
-        super().save(*args, **kwargs) 
-
-        if creating_installments and is_new: 
-            installment_amount = self.total_amount / Decimal(self.installments_number)
-            for i in range(self.installments_number):
-                due_date = self.purchase_date + relativedelta(months=i)
-                Installment.objects.create(
-                    expense=self,
-                    installment_amount=installment_amount,
-                    due_date=due_date,
-                    month=due_date.month,
-                    year=due_date.year,
-                    user=self.user
-                )
+        with transaction.atomic():
+            previous = None if self.pk is None else self._previous_state()
+            super().save(*args, **kwargs)
+
+            schedule_changed = previous is None or any(
+                getattr(previous, field) != getattr(self, field) for field in self.SCHEDULE_FIELDS
+            )
+            category_changed = previous is not None and previous.category_id != self.category_id
+            if schedule_changed or category_changed:
+                old_deltas = previous.ledger_deltas(-1) if previous is not None else {}
+                new_deltas = self.ledger_deltas()
+                if schedule_changed:
+                    self.sync_installments(previous)
+                    MonthlyLedger.adjust(self.user_id, merge_deltas(old_deltas, new_deltas))
+                if previous is not None and (category_changed or previous.user_id != self.user_id):
+                    CategoryRollup.adjust(previous.user_id, previous.category_id, old_deltas)
+                    CategoryRollup.adjust(self.user_id, self.category_id, new_deltas)
+                else:
+                    CategoryRollup.adjust(self.user_id, self.category_id, merge_deltas(old_deltas, new_deltas))
+            self._remember_schedule()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            deltas = self.ledger_deltas(-1)
+            MonthlyLedger.adjust(self.user_id, deltas)
+            CategoryRollup.adjust(self.user_id, self.category_id, deltas)
+            delete_tracked(Installment.objects.filter(expense_id=self.pk))
+            record_deletions(Expense, [(self.pk, self.user_id)])
+            return super().delete(*args, **kwargs)
 
 class Installment(models.Model):
     expense = models.ForeignKey(Expense, related_name='installments', on_delete=models.CASCADE)
-    installment_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    installment_amount = MoneyField()
     due_date = models.DateField()
     month = models.PositiveIntegerField()
     year = models.PositiveIntegerField()
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    SYNC_TYPE = 'installment'
         
     def __str__(self):
         return f'Parcela de {self.expense.description} - R$ {self.installment_amount} - Venc: {self.due_date.strftime("%m/%Y")}'
 
     class Meta:
         ordering = ['due_date']
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='installment_user_period_idx'),
+            models.Index(fields=['user', 'updated_at'], name='installment_user_updated_idx'),
+        ]
+
+class FixedExpenseQuerySet(models.QuerySet):
+    def active_between(self, first_day, end_day):
+        return self.filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=first_day),
+            start_date__lt=end_day
+        )
+
+    def with_month_amount(self, year, month):
+        override = FixedExpenseOccurrence.objects.filter(
+            fixed_expense=OuterRef('pk'), year=year, month=month
+        ).order_by().values('amount')[:1]
+        return self.annotate(month_amount=Coalesce(Subquery(override), F('monthly_amount')))
+
+    def bulk_create_rules(self, rules, batch_size=500):
+        # Regras novas ainda não têm ajustes mensais: cada uma soma seu valor aos resumos do período.
+        with transaction.atomic():
+            rules = self.bulk_create(rules, batch_size=batch_size)
+            for rule in rules:
+                MonthlyLedger.objects.filter(period_q(rule.start_date, rule.end_date), user_id=rule.user_id).update(
+                    fixed_total=F('fixed_total') + money(rule.monthly_amount)
+                )
+                rule.category_shift(1)
+        return rules
+
 
 class FixedExpense(models.Model):
     description = models.CharField(max_length=255, verbose_name="Descrição")
-    monthly_amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Valor Mensal Fixo")
+    monthly_amount = MoneyField(verbose_name="Valor Mensal Fixo")
     start_date = models.DateField(default=timezone.now, verbose_name="Data de Início (Primeiro Mês)")
+    end_date = models.DateField(null=True, blank=True, verbose_name="Data de Término (Último Mês)")
+    category = models.ForeignKey(Category, null=True, blank=True, on_delete=models.SET_NULL, verbose_name="Categoria")
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    objects = FixedExpenseQuerySet.as_manager()
+
+    SYNC_TYPE = 'fixed_expense'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_date'], name='fixedexpense_user_start_idx'),
+            models.Index(fields=['user', 'updated_at'], name='fixedexpense_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.description} - R$ {self.monthly_amount}/mês (a partir de {self.start_date.strftime("%m/%Y")})'
 
+    def covers(self, year, month):
+        period = date(year, month, 1)
+        if months_between(self.start_date, period) < 0:
+            return False
+        return self.end_date is None or months_between(period, self.end_date) >= 0
+
+    def periods(self, first_day, last_day):
+        current = max(first_day.replace(day=1), self.start_date.replace(day=1))
+        if self.end_date is not None:
+            last_day = min(last_day, self.end_date)
+        while current <= last_day:
+            yield current.year, current.month
+            current += relativedelta(months=1)
+
+    def occurrence_for(self, year, month):
+        occurrence = self.occurrences.filter(year=year, month=month).first() if self.pk else None
+        return occurrence or self.build_occurrence(year, month)
+
+    def build_occurrence(self, year, month):
+        occurrence_date = self.start_date + relativedelta(year=year, month=month)
+        return FixedExpenseOccurrence(
+            fixed_expense=self,
+            amount=self.monthly_amount,
+            occurrence_date=occurrence_date,
+            month=month,
+            year=year,
+            user_id=self.user_id
+        )
+
+    def ledger_shift(self, sign):
+        overrides = [o for o in self.occurrences.all() if self.covers(o.year, o.month)]
+        ledgers = MonthlyLedger.objects.filter(period_q(self.start_date, self.end_date), user_id=self.user_id)
+        for o in overrides:
+            ledgers = ledgers.exclude(year=o.year, month=o.month)
+        ledgers.update(fixed_total=F('fixed_total') + money(sign * Decimal(self.monthly_amount)))
+        MonthlyLedger.adjust(self.user_id, merge_deltas(*(
+            {(o.year, o.month): {'fixed_total': sign * o.amount}} for o in overrides
+        )))
+        self.category_shift(sign, overrides)
+
+    def category_shift(self, sign, overrides=()):
+        if self.category_id is None:
+            return
+        amounts = {(o.year, o.month): o.amount for o in overrides}
+        months = MonthlyLedger.objects.filter(
+            period_q(self.start_date, self.end_date), user_id=self.user_id
+        ).values_list('year', 'month')
+        CategoryRollup.apply(self.user_id, self.category_id, {
+            period: sign * amounts.get(period, Decimal(self.monthly_amount)) for period in months
+        })
+
+    def reconcile_overrides(self):
+        # Ajustes fora do novo período ou iguais ao novo valor deixam de fazer sentido;
+        # os demais acompanham o dia de vencimento da regra.
+        stale = []
+        moved = []
+        for override in self.occurrences.all():
+            if not self.covers(override.year, override.month) or override.amount == self.monthly_amount:
+                stale.append(override.pk)
+                continue
+            occurrence_date = self.start_date + relativedelta(year=override.year, month=override.month)
+            if override.occurrence_date != occurrence_date:
+                override.occurrence_date = occurrence_date
+                override.updated_at = timezone.now()
+                moved.append(override)
+        if stale:
+            delete_tracked(FixedExpenseOccurrence.objects.filter(pk__in=stale))
+        FixedExpenseOccurrence.objects.bulk_update(moved, ['occurrence_date', 'updated_at'], batch_size=500)
+
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        if is_new: 
-            for i in range(12):
-                occurrence_date = self.start_date + relativedelta(months=i)
-                FixedExpenseOccurrence.objects.create(
-                    fixed_expense=self,
-                    amount=self.monthly_amount,
-                    occurrence_date=occurrence_date,
-                    month=occurrence_date.month,
-                    year=occurrence_date.year,
-                    user=self.user
-                )
+        with transaction.atomic():
+            old_instance = FixedExpense.objects.filter(pk=self.pk).first() if self.pk else None
+            schedule_changed = old_instance is None or any(
+                getattr(old_instance, field) != getattr(self, field)
+                for field in ('monthly_amount', 'start_date', 'end_date', 'category_id')
+            )
+            if old_instance and schedule_changed:
+                old_instance.ledger_shift(-1)
+            super().save(*args, **kwargs)
+            if old_instance and schedule_changed:
+                self.reconcile_overrides()
+            if schedule_changed:
+                self.ledger_shift(1)
+
+    def save_from(self, first_day):
+        """Aplica as alterações só a partir do mês de first_day e devolve a regra que vale desse mês em diante."""
+        first_day = first_day.replace(day=1)
+        with transaction.atomic():
+            old_instance = FixedExpense.objects.select_for_update().get(pk=self.pk)
+            if (
+                months_between(old_instance.start_date, first_day) <= 0
+                or not old_instance.covers(first_day.year, first_day.month)
+                or (self.end_date is not None and months_between(first_day, self.end_date) < 0)
+            ):
+                # Não há meses anteriores a preservar (ou nada a partir deste mês): vale para a regra toda.
+                self.save()
+                return self
+
+            if months_between(first_day, self.start_date) > 0:
+                start_date = self.start_date
+            else:
+                start_date = self.start_date + relativedelta(year=first_day.year, month=first_day.month)
+            rule = FixedExpense(
+                description=self.description,
+                monthly_amount=self.monthly_amount,
+                start_date=start_date,
+                end_date=self.end_date,
+                category_id=self.category_id,
+                user_id=self.user_id,
+            )
+
+            old_instance.ledger_shift(-1)
+            old_instance.end_date = first_day - relativedelta(days=1)
+            super(FixedExpense, old_instance).save(update_fields=['end_date', 'updated_at'])
+            super(FixedExpense, rule).save()
+            old_instance.occurrences.filter(period_q(first_day)).update(fixed_expense=rule, updated_at=timezone.now())
+            rule.reconcile_overrides()
+            old_instance.ledger_shift(1)
+            rule.ledger_shift(1)
+        return rule
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self.ledger_shift(-1)
+            delete_tracked(self.occurrences.all())
+            record_deletions(FixedExpense, [(self.pk, self.user_id)])
+            return super().delete(*args, **kwargs)
 
 class FixedExpenseOccurrence(models.Model):
     fixed_expense = models.ForeignKey(FixedExpense, related_name='occurrences', on_delete=models.CASCADE)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    amount = MoneyField(verbose_name="Valor neste Mês")
     occurrence_date = models.DateField() 
     month = models.PositiveIntegerField()
     year = models.PositiveIntegerField()
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    SYNC_TYPE = 'fixed_expense_occurrence'
 
     def __str__(self):
         return f'Ocorrência de {self.fixed_expense.description} - R$ {self.amount} - Mês: {self.occurrence_date.strftime("%m/%Y")}'
@@ -112,4 +534,287 @@ class FixedExpenseOccurrence(models.Model):
         ordering = ['occurrence_date']
         verbose_name = "Ocorrência de Gasto Fixo"
         verbose_name_plural = "Ocorrências de Gastos Fixos"
+        unique_together = ('fixed_expense', 'year', 'month')
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='occurrence_user_period_idx'),
+            models.Index(fields=['user', 'updated_at'], name='occurrence_user_updated_idx'),
+        ]
+
+    def _ledger_adjust(self, delta):
+        if self.fixed_expense.covers(self.year, self.month):
+            deltas = {(self.year, self.month): {'fixed_total': delta}}
+            MonthlyLedger.adjust(self.user_id, deltas)
+            CategoryRollup.adjust(self.user_id, self.fixed_expense.category_id, deltas)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = None
+            if self.pk is not None:
+                previous = FixedExpenseOccurrence.objects.filter(pk=self.pk).values_list('amount', flat=True).first()
+            if previous is None:
+                previous = self.fixed_expense.monthly_amount
+            super().save(*args, **kwargs)
+            self._ledger_adjust(Decimal(self.amount) - previous)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            self._ledger_adjust(self.fixed_expense.monthly_amount - self.amount)
+            record_deletions(FixedExpenseOccurrence, [(self.pk, self.user_id)])
+            return super().delete(*args, **kwargs)
+
+
+class MonthlyLedger(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    salary = MoneyField(max_digits=12, default=Decimal('0.00'))
+    variable_total = MoneyField(max_digits=12, default=Decimal('0.00'))
+    installment_total = MoneyField(max_digits=12, default=Decimal('0.00'))
+    fixed_total = MoneyField(max_digits=12, default=Decimal('0.00'))
+
+    TOTAL_FIELDS = ('salary', 'variable_total', 'installment_total', 'fixed_total')
+
+    class Meta:
+        unique_together = ('user', 'year', 'month')
+        verbose_name = "Resumo Mensal"
+        verbose_name_plural = "Resumos Mensais"
+
+    def __str__(self):
+        return f'Resumo de {self.month:02d}/{self.year} - Saldo R$ {self.balance}'
+
+    @property
+    def total_expenses(self):
+        return self.variable_total + self.installment_total + self.fixed_total
+
+    @property
+    def balance(self):
+        return self.salary - self.total_expenses
+
+    @classmethod
+    def compute(cls, user_id, year, month, using=None):
+        first_day, next_month = month_bounds(year, month)
+        salary = Salary.objects.using(using).filter(user_id=user_id, year=year).values_list('amount', flat=True).first()
+        variable_total = Expense.objects.using(using).filter(
+            user_id=user_id,
+            is_installment=False,
+            purchase_date__gte=first_day,
+            purchase_date__lt=next_month
+        ).aggregate(total=Sum('total_amount'))['total']
+        installment_total = Installment.objects.using(using).filter(
+            user_id=user_id, month=month, year=year
+        ).aggregate(total=Sum('installment_amount'))['total']
+        fixed_total = FixedExpense.objects.using(using).filter(user_id=user_id).active_between(
+            first_day, next_month
+        ).with_month_amount(year, month).aggregate(total=Sum('month_amount'))['total']
+        return cls(
+            user_id=user_id,
+            year=year,
+            month=month,
+            salary=salary or Decimal('0.00'),
+            variable_total=variable_total or Decimal('0.00'),
+            installment_total=installment_total or Decimal('0.00'),
+            fixed_total=fixed_total or Decimal('0.00'),
+        )
+
+    @classmethod
+    def compute_and_store(cls, user_id, year, month):
+        """Calcula e grava o resumo do mês (e os totais por categoria) numa única transação.
+
+        Com transações IMMEDIATE, um Expense.save concorrente espera esta terminar e o
+        adjust dele encontra a linha já gravada; calcular fora da transação deixaria
+        gravado um total que não inclui essa escrita. Tudo é lido do banco principal:
+        um total calculado na réplica ficaria gravado para sempre, mesmo que ela estivesse atrasada.
+        """
+        using = router.db_for_write(cls)
+        ledgers = cls.objects.using(using).filter(user_id=user_id, year=year, month=month)
+        # A réplica pode só não ter o mês ainda; confere o principal antes de pegar o lock de escrita.
+        ledger = ledgers.first()
+        if ledger is not None:
+            return ledger.with_category_rollups(using)
+        try:
+            with transaction.atomic(using=using):
+                ledger = ledgers.first()
+                if ledger is not None:
+                    return ledger.with_category_rollups(using)
+                ledger = cls.compute(user_id, year, month, using=using)
+                ledger.save(using=using)
+                # Os totais por categoria passam a ser mantidos junto com o resumo do mês.
+                ledger.category_rollups = CategoryRollup.objects.using(using).bulk_create(
+                    CategoryRollup.compute(user_id, year, month, using=using)
+                )
+                return ledger
+        except IntegrityError:
+            return ledgers.get().with_category_rollups(using)
+
+    def with_category_rollups(self, using):
+        # Resumo lido do principal porque a réplica ainda não tem o mês: os totais por categoria
+        # também só existem lá, e a réplica passaria a despesa toda para "Sem categoria".
+        self.category_rollups = list(CategoryRollup.objects.using(using).filter(
+            user_id=self.user_id, year=self.year, month=self.month
+        ))
+        return self
+
+    @classmethod
+    def for_month(cls, user_id, year, month):
+        ledger = cls.objects.filter(user_id=user_id, year=year, month=month).first()
+        if ledger is not None:
+            return ledger
+        return cls.compute_and_store(user_id, year, month)
+
+    @classmethod
+    async def afor_month(cls, user_id, year, month):
+        ledger = await cls.objects.filter(user_id=user_id, year=year, month=month).afirst()
+        if ledger is not None:
+            return ledger
+        # transaction.atomic() ainda não tem versão assíncrona.
+        return await sync_to_async(cls.compute_and_store)(user_id, year, month)
 
+    @classmethod
+    def adjust(cls, user_id, deltas):
+        # Só atualiza os meses que já existem; os demais são calculados na primeira leitura.
+        groups = defaultdict(list)
+        for (year, month), changes in deltas.items():
+            changes = tuple(sorted((field, value) for field, value in changes.items() if value))
+            if changes:
+                groups[changes].append(Q(year=year, month=month))
+        for changes, periods in groups.items():
+            condition = Q()
+            for period in periods:
+                condition |= period
+            cls.objects.filter(condition, user_id=user_id).update(
+                **{field: F(field) + money(value) for field, value in changes}
+            )
+
+
+class CategoryRollup(models.Model):
+    """Total gasto por categoria em um mês, mantido nas mesmas gravações que atualizam o MonthlyLedger.
+
+    Só existe para meses que já têm resumo mensal; "Sem categoria" é o total do resumo menos a soma destes.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, related_name='rollups', on_delete=models.CASCADE)
+    year = models.PositiveIntegerField()
+    month = models.PositiveIntegerField()
+    total = MoneyField(max_digits=12, default=Decimal('0.00'))
+
+    class Meta:
+        unique_together = ('user', 'category', 'year', 'month')
+        verbose_name = "Total Mensal por Categoria"
+        verbose_name_plural = "Totais Mensais por Categoria"
+        indexes = [
+            models.Index(fields=['user', 'year', 'month'], name='rollup_user_period_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.category} em {self.month:02d}/{self.year}: R$ {self.total}'
+
+    @classmethod
+    def compute(cls, user_id, year, month, using=None):
+        first_day, next_month = month_bounds(year, month)
+        totals = defaultdict(Decimal)
+        sources = (
+            Expense.objects.using(using).filter(
+                user_id=user_id,
+                is_installment=False,
+                category__isnull=False,
+                purchase_date__gte=first_day,
+                purchase_date__lt=next_month
+            ).values('category_id').annotate(total=Sum('total_amount')).values_list('category_id', 'total'),
+            Installment.objects.using(using).filter(
+                user_id=user_id, month=month, year=year, expense__category__isnull=False
+            ).values('expense__category_id').annotate(total=Sum('installment_amount')).values_list(
+                'expense__category_id', 'total'
+            ),
+            FixedExpense.objects.using(using).filter(user_id=user_id, category__isnull=False).active_between(
+                first_day, next_month
+            ).with_month_amount(year, month).values('category_id').annotate(total=Sum('month_amount')).values_list(
+                'category_id', 'total'
+            ),
+        )
+        for rows in sources:
+            for category_id, total in rows.order_by():
+                totals[category_id] += total
+        return [
+            cls(user_id=user_id, category_id=category_id, year=year, month=month, total=total)
+            for category_id, total in totals.items()
+        ]
+
+    @classmethod
+    def apply(cls, user_id, category_id, totals):
+        """Soma os valores de {(ano, mês): valor} à categoria; quem chama já filtrou os meses com resumo."""
+        totals = {period: value for period, value in totals.items() if value}
+        if category_id is None or not totals:
+            return
+        condition = Q()
+        for year, month in totals:
+            condition |= Q(year=year, month=month)
+        existing = set(cls.objects.filter(condition, user_id=user_id, category_id=category_id).values_list('year', 'month'))
+
+        groups = defaultdict(list)
+        for period, value in totals.items():
+            if period in existing:
+                groups[value].append(Q(year=period[0], month=period[1]))
+        for value, periods in groups.items():
+            condition = Q()
+            for period in periods:
+                condition |= period
+            cls.objects.filter(condition, user_id=user_id, category_id=category_id).update(total=F('total') + money(value))
+        cls.objects.bulk_create([
+            cls(user_id=user_id, category_id=category_id, year=year, month=month, total=value)
+            for (year, month), value in totals.items() if (year, month) not in existing
+        ])
+
+    @classmethod
+    def adjust(cls, user_id, category_id, deltas):
+        # Recebe os mesmos deltas do MonthlyLedger.adjust e soma os campos de cada mês.
+        if category_id is None:
+            return
+        totals = defaultdict(Decimal)
+        for period, changes in deltas.items():
+            totals[period] += sum(changes.values(), Decimal('0'))
+        totals = {period: value for period, value in totals.items() if value}
+        if not totals:
+            return
+        condition = Q()
+        for year, month in totals:
+            condition |= Q(year=year, month=month)
+        tracked = set(MonthlyLedger.objects.filter(condition, user_id=user_id).values_list('year', 'month'))
+        cls.apply(user_id, category_id, {period: value for period, value in totals.items() if period in tracked})
+
+
+class IdempotencyKey(models.Model):
+    """Chave enviada pelo cliente em cada item de um lote; reenviar o mesmo item não duplica o registro."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)
+    object_type = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'key')
+        verbose_name = "Chave de Idempotência"
+        verbose_name_plural = "Chaves de Idempotência"
+
+    def __str__(self):
+        return f'{self.key} -> {self.object_type} #{self.object_id}'
+
+
+class Tombstone(models.Model):
+    """Registro de uma linha apagada, devolvido pela sincronização incremental até o cliente aplicá-lo."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    object_type = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Registro de Exclusão"
+        verbose_name_plural = "Registros de Exclusão"
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.object_type} #{self.object_id} apagado em {self.deleted_at:%d/%m/%Y %H:%M}'
@@ -0,0 +1,108 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+
+REPLICA = 'replica'
+
+# Estado da requisição de relatório: um dict, para que a decisão tomada dentro de um
+# sync_to_async (que roda numa cópia do contexto) valha para o resto da requisição.
+_reporting = ContextVar('finance_reporting', default=None)
+
+
+def replica_marker():
+    return f'{settings.DATABASES[REPLICA]["NAME"]}.refreshed'
+
+
+def replica_refreshed_at():
+    if REPLICA not in settings.DATABASES:
+        return None
+    try:
+        return os.stat(replica_marker()).st_mtime
+    except OSError:
+        return None
+
+
+def mark_replica_refreshed(started):
+    marker = replica_marker()
+    with open(marker, 'a'):
+        pass
+    os.utime(marker, (started, started))
+
+
+def replica_is_current(user_id):
+    """A réplica já tem todas as gravações do usuário, de qualquer sessão, processo ou comando?"""
+    if replica_refreshed_at() is None:
+        return False
+    from .sync import last_change
+    try:
+        return last_change(user_id, REPLICA) == last_change(user_id, DEFAULT_DB_ALIAS)
+    except DatabaseError:
+        # Réplica com esquema antigo (migração aplicada antes de um refresh_replica).
+        return False
+
+
+@contextmanager
+def reporting_reads(user_id):
+    token = _reporting.set({'user_id': user_id})
+    try:
+        yield
+    finally:
+        _reporting.reset(token)
+
+
+def reporting_stream(user_id, iterable):
+    # Respostas em streaming consultam o banco depois que a view retorna.
+    def stream():
+        with reporting_reads(user_id):
+            yield from iterable
+    return stream()
+
+
+async def areporting_stream(user_id, iterable):
+    """Versão para ASGI: com um gerador síncrono, o StreamingHttpResponse junta a resposta
+    inteira na memória antes do primeiro byte. Aqui cada bloco é gerado num sync_to_async.
+
+    O estado fica no mesmo dict entre os blocos, para que a exportação toda leia do mesmo banco.
+    """
+    iterator = iter(iterable)
+    state = {'user_id': user_id}
+    done = object()
+
+    def next_chunk():
+        token = _reporting.set(state)
+        try:
+            return next(iterator, done)
+        finally:
+            _reporting.reset(token)
+
+    while (chunk := await sync_to_async(next_chunk)()) is not done:
+        yield chunk
+
+
+class ReportingRouter:
+    """Leituras de relatórios vão para a réplica, se ela já contém a última escrita do usuário.
+
+    A comparação é feita com os dados do próprio banco (ver sync.last_change), uma vez por
+    requisição; assim toda a requisição lê do mesmo banco.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _reporting.get()
+        if state is None or model._meta.app_label != 'expenses':
+            return None
+        if 'database' not in state:
+            state['database'] = REPLICA if replica_is_current(state['user_id']) else None
+        return state['database']
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
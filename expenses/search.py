@@ -0,0 +1,118 @@
+import re
+
+from django.db import connections, router
+
+from .fields import from_cents
+from .models import Expense, FixedExpense
+
+MAX_TERMS = 8
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Índices FTS5 de "conteúdo externo": guardam só os termos e leem a descrição da própria tabela.
+# unicode61 com remove_diacritics faz "farmacia" achar "Farmácia"; prefix acelera buscas por prefixo.
+INDEXES = (
+    ('expenses_expense_fts', 'expenses_expense'),
+    ('expenses_fixedexpense_fts', 'expenses_fixedexpense'),
+)
+
+
+def schema_statements():
+    for index, table in INDEXES:
+        yield (
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5("
+            f"description, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        # Gatilhos em vez de sinais: também cobrem bulk_create, update() e apagamentos em cascata.
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {index}(rowid, description) VALUES (new.id, new.description); END"
+        )
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {index}({index}, rowid, description) VALUES ('delete', old.id, old.description); END"
+        )
+        yield (
+            f"CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF description ON {table} BEGIN "
+            f"INSERT INTO {index}({index}, rowid, description) VALUES ('delete', old.id, old.description); "
+            f"INSERT INTO {index}(rowid, description) VALUES (new.id, new.description); END"
+        )
+
+
+def drop_statements():
+    for index, _ in INDEXES:
+        for suffix in ('insert', 'delete', 'update'):
+            yield f'DROP TRIGGER IF EXISTS {index}_{suffix}'
+        yield f'DROP TABLE IF EXISTS {index}'
+
+
+def install_search_index(cursor, rebuild=True):
+    """Cria (se faltar) os índices e gatilhos e, com rebuild, reindexa tudo a partir das tabelas.
+
+    Recriar uma tabela (como o SQLite faz em alguns AlterField) apaga os gatilhos dela;
+    o comando rebuild_search_index chama esta função para restaurá-los.
+    """
+    for statement in schema_statements():
+        cursor.execute(statement)
+    if rebuild:
+        for index, _ in INDEXES:
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+
+def fts_query(text):
+    # Cada palavra vira um prefixo entre aspas: nada do que o usuário digita é lido como operador FTS5.
+    terms = re.findall(r'\w+', text)[:MAX_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_descriptions(user_id, text, start=None, end=None, limit=DEFAULT_LIMIT):
+    query = fts_query(text)
+    if not query:
+        return []
+
+    expense_filters, expense_params = ['e.user_id = %s'], [user_id]
+    fixed_filters, fixed_params = ['f.user_id = %s'], [user_id]
+    if start is not None:
+        expense_filters.append('e.purchase_date >= %s')
+        expense_params.append(start.isoformat())
+        fixed_filters.append('(f.end_date IS NULL OR f.end_date >= %s)')
+        fixed_params.append(start.isoformat())
+    if end is not None:
+        expense_filters.append('e.purchase_date <= %s')
+        expense_params.append(end.isoformat())
+        fixed_filters.append('f.start_date <= %s')
+        fixed_params.append(end.isoformat())
+
+    results = []
+    with connections[router.db_for_read(Expense)].cursor() as cursor:
+        cursor.execute(
+            'SELECT e.id, e.description, e.total_amount, e.purchase_date, e.is_installment, '
+            'e.installments_number, fts.rank '
+            'FROM expenses_expense_fts fts JOIN expenses_expense e ON e.id = fts.rowid '
+            f'WHERE expenses_expense_fts MATCH %s AND {" AND ".join(expense_filters)} '
+            'ORDER BY fts.rank LIMIT %s',
+            [query, *expense_params, limit],
+        )
+        for pk, description, amount, day, is_installment, installments_number, rank in cursor.fetchall():
+            results.append((rank, {
+                'type': Expense.SYNC_TYPE, 'id': pk, 'description': description, 'amount': from_cents(amount),
+                'date': day, 'installments': installments_number if is_installment else None,
+            }))
+
+        cursor.execute(
+            'SELECT f.id, f.description, f.monthly_amount, f.start_date, f.end_date, fts.rank '
+            'FROM expenses_fixedexpense_fts fts JOIN expenses_fixedexpense f ON f.id = fts.rowid '
+            f'WHERE expenses_fixedexpense_fts MATCH %s AND {" AND ".join(fixed_filters)} '
+            'ORDER BY fts.rank LIMIT %s',
+            [query, *fixed_params, limit],
+        )
+        for pk, description, amount, start_date, end_date, rank in cursor.fetchall():
+            results.append((rank, {
+                'type': FixedExpense.SYNC_TYPE, 'id': pk, 'description': description, 'amount': from_cents(amount),
+                'date': start_date, 'end_date': end_date,
+            }))
+
+    # bm25: quanto menor, mais relevante.
+    results.sort(key=lambda result: result[0])
+    return [result for _, result in results[:limit]]
@@ -0,0 +1,139 @@
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F, Value
+
+from .models import Category, Expense, Installment, FixedExpense, FixedExpenseOccurrence, Salary, Tombstone
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# A posição na tupla é o último critério de desempate do cursor; não reordenar.
+SOURCES = (
+    (Expense, 'updated_at', (
+        'description', 'total_amount', 'purchase_date', 'is_installment', 'installments_number', 'category_id',
+    )),
+    (Installment, 'updated_at', ('expense_id', 'installment_amount', 'due_date', 'month', 'year')),
+    (FixedExpense, 'updated_at', ('description', 'monthly_amount', 'start_date', 'end_date', 'category_id')),
+    (FixedExpenseOccurrence, 'updated_at', ('fixed_expense_id', 'amount', 'occurrence_date', 'month', 'year')),
+    (Salary, 'updated_at', ('amount', 'year')),
+    (Tombstone, 'deleted_at', ('object_type', 'object_id')),
+    (Category, 'updated_at', ('name',)),
+)
+TOMBSTONES = [model for model, _, _ in SOURCES].index(Tombstone)
+
+
+def last_change(user_id, using=DEFAULT_DB_ALIAS):
+    """Marca da última gravação do usuário no banco `using` (exclusões contam pelas lápides).
+
+    Cada gravação marca updated_at (ou cria a lápide) na mesma transação dos dados, então
+    o mesmo valor no principal e na réplica quer dizer que a réplica já tem tudo o que o
+    usuário gravou. Consulta direto na conexão, sem passar pelo roteador.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    arms = ' UNION ALL '.join(
+        f'SELECT MAX({quote(model._meta.get_field(field).column)}) AS moment '
+        f'FROM {quote(model._meta.db_table)} WHERE user_id = %s'
+        for model, field, _ in SOURCES
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MAX(moment) FROM ({arms})', [user_id] * len(SOURCES))
+        moment = cursor.fetchone()[0]
+    # Só os dígitos do instante: serve de ETag e de chave de cache, que não aceitam espaços.
+    return re.sub(r'\D', '', str(moment or '')) or '0'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(moment, pk, source):
+    return f'{(moment - EPOCH) // timedelta(microseconds=1)}.{pk}.{source}'
+
+
+def decode_cursor(value):
+    try:
+        micros, pk, source = (int(part) for part in value.split('.'))
+    except ValueError:
+        raise InvalidCursor('Cursor inválido.')
+    if not 0 <= source < len(SOURCES) or not 0 <= pk < 2 ** 63:
+        raise InvalidCursor('Cursor inválido.')
+    try:
+        return EPOCH + timedelta(microseconds=micros), pk, source
+    except OverflowError:
+        raise InvalidCursor('Cursor inválido.')
+
+
+def _arms(queryset, field, source, cursor):
+    if cursor is None:
+        return [queryset]
+    # Ordem (instante, pk, fonte). Mesmo instante e pk maior vira uma busca por rowid no índice,
+    # em vez de reler todas as linhas empatadas (ex.: as preenchidas de uma vez pela migração).
+    moment, pk, cursor_source = cursor
+    same_moment = {field: moment, 'pk__gte' if source > cursor_source else 'pk__gt': pk}
+    return [queryset.filter(**same_moment), queryset.filter(**{f'{field}__gt': moment})]
+
+
+def change_rows(user_id, cursor=None):
+    """Uma única consulta UNION ALL, que o SQLite resolve intercalando os índices (user, updated_at).
+
+    Ser uma só consulta garante um retrato consistente: uma gravação que termine no meio
+    da leitura não aparece em uma tabela e some de outra.
+    """
+    arms = []
+    for source, (model, field, _) in enumerate(SOURCES):
+        queryset = model.objects.filter(user_id=user_id).values(
+            moment=F(field), ref=F('pk'), source=Value(source)
+        ).order_by()
+        arms.extend(_arms(queryset, field, source, cursor))
+    return arms[0].union(*arms[1:], all=True).order_by('moment', 'ref', 'source')
+
+
+def changes_since(user_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Linhas alteradas ou apagadas depois do cursor, em páginas de até `limit` itens.
+
+    As gravações rodam em transações IMMEDIATE, que pegam o lock de escrita antes de
+    marcar updated_at; assim a ordem dos instantes acompanha a ordem dos commits e um
+    cursor nunca pula uma linha gravada depois dele.
+    """
+    rows = list(change_rows(user_id, cursor)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    refs = [[] for _ in SOURCES]
+    for row in rows:
+        refs[row['source']].append(row['ref'])
+    details = [{} for _ in SOURCES]
+    for source, pks in enumerate(refs):
+        if pks:
+            model, _, fields = SOURCES[source]
+            details[source] = {row['pk']: row for row in model.objects.filter(pk__in=pks).values('pk', *fields)}
+
+    changes = []
+    for row in rows:
+        data = details[row['source']].get(row['ref'])
+        if data is None:
+            # Apagada depois da leitura acima: a lápide dela vem numa próxima página.
+            continue
+        if row['source'] == TOMBSTONES:
+            changes.append({
+                'type': data['object_type'], 'id': data['object_id'], 'deleted': True, 'changed_at': row['moment'],
+            })
+        else:
+            fields = {key: value for key, value in data.items() if key != 'pk'}
+            changes.append({
+                'type': SOURCES[row['source']][0].SYNC_TYPE, 'id': row['ref'], 'deleted': False,
+                'changed_at': row['moment'], 'data': fields,
+            })
+
+    if rows:
+        last = rows[-1]
+        cursor = (last['moment'], last['ref'], last['source'])
+    return {
+        'changes': changes,
+        'cursor': encode_cursor(*cursor) if cursor is not None else None,
+        'has_more': has_more,
+    }
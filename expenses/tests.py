@@ -0,0 +1,172 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q, Sum
+from django.test import TestCase
+from django.urls import reverse
+
+from .balance import compute_monthly_balance
+from .models import Category, Expense, Installment, FixedExpense, Salary, MonthlyLedger, month_bounds
+
+
+def seed_month(user, rows, year=2025, month=6):
+    """Cria `rows` lançamentos no mês: à vista, parcelados e gastos fixos, metade com categoria."""
+    category = Category.objects.create(user=user, name='Mercado')
+    day = date(year, month, 10)
+    Salary.objects.create(user=user, year=year, amount=Decimal('10000.00'))
+    Expense.objects.bulk_create_with_installments(
+        Expense(
+            user=user, description=f'Despesa {n}', total_amount=Decimal('30.00'), purchase_date=day,
+            is_installment=n % 3 == 1, installments_number=3 if n % 3 == 1 else None,
+            category=category if n % 2 else None
+        )
+        for n in range(rows) if n % 3 != 2
+    )
+    FixedExpense.objects.bulk_create_rules([
+        FixedExpense(
+            user=user, description=f'Fixo {n}', monthly_amount=Decimal('15.00'), start_date=date(year, 1, 5),
+            category=category if n % 2 else None
+        )
+        for n in range(rows) if n % 3 == 2
+    ])
+
+
+class MonthlyBalanceQueryCountTests(TestCase):
+    """O saldo mensal custa um número fixo de consultas, qualquer que seja o volume do mês."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def assert_constant_queries(self, check):
+        for rows in (10, 100, 1000):
+            with self.subTest(rows=rows):
+                user = User.objects.create_user(f'saldo{rows}', password='x')
+                seed_month(user, rows)
+                MonthlyLedger.for_month(user.pk, 2025, 6)
+                check(user, rows)
+
+    def test_compute_monthly_balance(self):
+        # resumo mensal, totais por categoria, nomes das categorias e o UNION das linhas do mês
+        def check(user, rows):
+            with self.assertNumQueries(4):
+                balance = compute_monthly_balance(user.pk, 2025, 6)
+            self.assertEqual(len(balance['installments']) + len(balance['fixed_expenses_occurrences']), rows)
+
+        self.assert_constant_queries(check)
+
+    def test_monthly_balance_page(self):
+        # sessão, usuário, versão do cache e as quatro consultas do saldo
+        def check(user, rows):
+            self.client.force_login(user)
+            with self.assertNumQueries(7):
+                response = self.client.get(reverse('monthly_balance'), {'year': 2025, 'month': 6})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['installments']) + len(response.context['fixed_expenses_occurrences']), rows)
+
+        self.assert_constant_queries(check)
+
+
+class ReplicaMissingMonthTests(TestCase):
+    """Mês calculado depois do último refresh_replica: resumo e totais por categoria só existem no principal."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user('replica', password='x')
+        self.food = Category.objects.create(user=self.user, name='Alimentação')
+        Expense.objects.create(
+            user=self.user, description='Almoço', total_amount=Decimal('10.00'),
+            purchase_date=date(2025, 5, 3), category=self.food
+        )
+        # Primeira leitura do mês: grava o resumo e os totais por categoria no principal.
+        MonthlyLedger.for_month(self.user.pk, 2025, 5)
+
+    def test_stored_month_keeps_category_rollups(self):
+        ledger = MonthlyLedger.compute_and_store(self.user.pk, 2025, 5)
+        self.assertEqual(
+            [(rollup.category_id, rollup.total) for rollup in ledger.category_rollups],
+            [(self.food.pk, Decimal('10.00'))]
+        )
+
+    # Nos testes a réplica espelha o principal; aqui ela ainda não tem o resumo nem os totais do mês,
+    # e nenhum updated_at mudou, então o roteador continua lendo dela.
+    @mock.patch.object(MonthlyLedger, 'for_month', MonthlyLedger.compute_and_store)
+    @mock.patch('expenses.balance.category_totals', return_value=[])
+    def test_monthly_balance_keeps_categories(self, replica_totals):
+        balance = compute_monthly_balance(self.user.pk, 2025, 5)
+        self.assertEqual(
+            [(row['name'], row['total']) for row in balance['categories']],
+            [('Alimentação', Decimal('10.00'))]
+        )
+
+
+class QueryPlanTests(TestCase):
+    """As consultas mensais usam os índices compostos em vez de varrer as tabelas (EXPLAIN QUERY PLAN)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('planos', password='x')
+        seed_month(cls.user, 30)
+        cls.expense = Expense.objects.filter(user=cls.user).latest('pk')
+        cls.fixed_expense = FixedExpense.objects.filter(user=cls.user).latest('pk')
+
+    def hot_querysets(self, year=2025, month=6):
+        user_id = self.user.pk
+        first_day, next_month = month_bounds(year, month)
+        return {
+            'despesas variáveis do mês': (
+                'expense_user_date_idx',
+                Expense.objects.filter(
+                    user_id=user_id, is_installment=False,
+                    purchase_date__gte=first_day, purchase_date__lt=next_month
+                ).values('user_id').annotate(total=Sum('total_amount')),
+            ),
+            'parcelas do mês': (
+                'installment_user_period_idx',
+                Installment.objects.filter(user_id=user_id, year=year, month=month),
+            ),
+            'gastos fixos do mês': (
+                'fixedexpense_user_start_idx',
+                FixedExpense.objects.filter(user_id=user_id).active_between(
+                    first_day, next_month
+                ).with_month_amount(year, month),
+            ),
+            'lista de despesas (keyset)': (
+                'expense_user_date_idx',
+                Expense.objects.filter(
+                    Q(purchase_date__lt=first_day) | Q(pk__lt=self.expense.pk),
+                    user_id=user_id, purchase_date__lte=first_day
+                ).order_by('-purchase_date', '-pk')[:51],
+            ),
+            'lista de gastos fixos (keyset)': (
+                'fixedexpense_user_start_idx',
+                FixedExpense.objects.filter(
+                    Q(start_date__lt=first_day) | Q(pk__lt=self.fixed_expense.pk),
+                    user_id=user_id, start_date__lte=first_day
+                ).order_by('-start_date', '-pk')[:51],
+            ),
+            'salário do ano': (
+                None,
+                Salary.objects.filter(user_id=user_id, year=year),
+            ),
+            'resumo mensal': (
+                None,
+                MonthlyLedger.objects.filter(user_id=user_id, year=year, month=month),
+            ),
+        }
+
+    def test_monthly_queries_use_indexes(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN é específico do SQLite.')
+        for label, (index_name, queryset) in self.hot_querysets().items():
+            with self.subTest(label):
+                plan = queryset.explain()
+                table = queryset.model._meta.db_table
+                self.assertNotRegex(plan, rf'SCAN {table}\b(?! USING)')
+                if index_name is not None:
+                    self.assertIn(index_name, plan)
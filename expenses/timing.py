@@ -0,0 +1,56 @@
+import time
+from contextvars import ContextVar
+
+_current = ContextVar('finance_request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = []
+        self.template_ms = None
+        self._template_start = None
+
+    @property
+    def db_ms(self):
+        return sum(duration for _, duration in self.queries)
+
+    @property
+    def slowest(self):
+        return max(self.queries, key=lambda query: query[1], default=(None, 0.0))
+
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def template_started(self):
+        self._template_start = time.perf_counter()
+
+    def template_finished(self, response):
+        self.template_ms = (time.perf_counter() - self._template_start) * 1000
+        return response
+
+
+def start_request():
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries.append((sql, (time.perf_counter() - start) * 1000))
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Executado a cada nova conexão; com conexões persistentes, uma vez por conexão.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -8,6 +8,8 @@ urlpatterns = [
     
     path("add-expense/", AddExpenseView.as_view(), name="add_expense"),
     path("expenses/", ExpenseListView.as_view(), name="expense_list"),
+    path("import-expenses/", ImportExpensesView.as_view(), name="import_expenses"),
+    path("export/", ExportView.as_view(), name="export"),
     path("edit-expense/<int:pk>/", EditExpenseView.as_view(), name="edit_expense"),
     path("delete-expense/<int:pk>/", DeleteExpenseView.as_view(), name="delete_expense"),
     
@@ -19,8 +21,23 @@ urlpatterns = [
     path("add-fixed-expense/", AddFixedExpenseView.as_view(), name="add_fixed_expense"),
     path("edit-fixed-expense/<int:pk>/", EditFixedExpenseView.as_view(), name="edit_fixed_expense"),
     path("delete-fixed-expense/<int:pk>/", DeleteFixedExpenseView.as_view(), name="delete_fixed_expense"),
+    path("edit-fixed-expense/<int:pk>/<int:year>/<int:month>/", EditFixedExpenseOccurrenceView.as_view(), name="edit_fixed_expense_occurrence"),
+
+    path("categories/", CategoryListView.as_view(), name="category_list"),
+    path("add-category/", AddCategoryView.as_view(), name="add_category"),
+    path("edit-category/<int:pk>/", EditCategoryView.as_view(), name="edit_category"),
+    path("delete-category/<int:pk>/", DeleteCategoryView.as_view(), name="delete_category"),
 
     path("balance/", MonthlyBalanceView.as_view(), name="monthly_balance"),
+    path("annual/", AnnualOverviewView.as_view(), name="annual_overview"),
+    path("api/balance/", BalanceApiView.as_view(), name="balance_api"),
+    path("api/batch/", BatchApiView.as_view(), name="batch_api"),
+    path("api/sync/", SyncApiView.as_view(), name="sync_api"),
+    path("api/search/", SearchApiView.as_view(), name="search_api"),
+    path("api/categories/", CategoryApiView.as_view(), name="category_api"),
+    path("api/overview/", OverviewApiView.as_view(), name="overview_api"),
+    path("api/forecast/", ForecastApiView.as_view(), name="forecast_api"),
+    path("charts/<str:kind>/", ChartView.as_view(), name="chart"),
     path("", MonthlyBalanceView.as_view(), name="home"), 
 ]
 
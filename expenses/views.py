@@ -1,20 +1,37 @@
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse, JsonResponse, FileResponse
 from django.urls import reverse_lazy, reverse
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
-from django.views.generic import TemplateView, ListView
-from django.db.models import Sum, Q
+from django.views.generic import TemplateView, ListView, FormView, View
+from django.db.models import Q
 from django.utils import timezone
-from .models import Expense, Salary, Installment, FixedExpense, FixedExpenseOccurrence
-from .forms import ExpenseForm, SalaryForm, FixedExpenseForm
+from django.utils.cache import get_conditional_response
+from .models import Category, Expense, Salary, FixedExpense, FixedExpenseOccurrence, month_bounds
+from .balance import aget_monthly_balance, aget_overview, get_category_breakdown, month_name
+from .forms import CategoryForm, ExpenseForm, SalaryForm, FixedExpenseForm, EditFixedExpenseForm, FixedExpenseOccurrenceForm, ImportExpensesForm, ExportForm
+from .exporters import EXPORTS, stream_csv, stream_xlsx
+from .importers import import_expenses
+from .batch import BatchError, apply_batch
+from .sync import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, changes_since, decode_cursor
+from .search import DEFAULT_LIMIT, MAX_LIMIT, search_descriptions
+from .forecast import MAX_INSTALLMENTS, MAX_SCENARIOS, CashFlowForecast
+from .charts import CHART_TYPES, FORMATS, ChartTimeout, get_chart
+from .routers import areporting_stream, reporting_reads, reporting_stream
+from .cache import auser_version
 from decimal import Decimal
-import calendar
-import locale
+from datetime import date
+import io
+import math
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
-from dateutil.relativedelta import relativedelta 
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils.decorators import method_decorator
+from django.db import IntegrityError
+import json
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.mixins import LoginRequiredMixin, AccessMixin
 
 
 @csrf_exempt
@@ -53,6 +70,17 @@ def logout_view(request):
     return redirect('login')
 
 
+class AsyncLoginRequiredMixin(AccessMixin):
+    # request.user carrega o usuário de forma síncrona; nas views assíncronas ele vem de auser().
+    login_url = reverse_lazy('login')
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
+
+
 class ProfileView(LoginRequiredMixin, UpdateView):
     template_name = 'expenses/profile.html'
     model = User
@@ -68,6 +96,11 @@ class AddExpenseView(LoginRequiredMixin, CreateView):
     form_class = ExpenseForm
     template_name = 'expenses/add_expense.html'
     
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
     def form_valid(self, form):
         form.instance.user = self.request.user
         return super().form_valid(form)
@@ -81,26 +114,115 @@ class AddExpenseView(LoginRequiredMixin, CreateView):
         context['title'] = 'Adicionar Despesa Variável'
         return context
 
-class ExpenseListView(LoginRequiredMixin, ListView):
+class KeysetPaginationMixin:
+    keyset_field = None
+    page_size = 50
+
+    def get_cursor(self):
+        try:
+            day, pk = self.request.GET['after'].split('_')
+            return date.fromisoformat(day), int(pk)
+        except (KeyError, ValueError):
+            return None
+
+    def keyset_queryset(self, queryset):
+        field = self.keyset_field
+        cursor = self.get_cursor()
+        if cursor is not None:
+            day, pk = cursor
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': day}) | Q(pk__lt=pk),
+                **{f'{field}__lte': day}
+            )
+        return queryset.order_by(f'-{field}', '-pk')[:self.page_size + 1]
+
+    def keyset_page(self, rows):
+        self.next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            last = rows[-1]
+            self.next_cursor = f'{getattr(last, self.keyset_field).isoformat()}_{last.pk}'
+        return rows
+
+    def paginate_keyset(self, queryset):
+        return self.keyset_page(list(self.keyset_queryset(queryset)))
+
+    async def apaginate_keyset(self, queryset):
+        return self.keyset_page([row async for row in self.keyset_queryset(queryset)])
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await self.apaginate_keyset(self.get_queryset())
+        return self.render_to_response(self.get_context_data())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['is_first_page'] = self.get_cursor() is None
+        context['next_cursor'] = self.next_cursor
+        return context
+
+class ExpenseListView(AsyncLoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = Expense
     template_name = 'expenses/add_or_edit_expense.html'
     context_object_name = 'expenses'
-    ordering = ['-purchase_date']
+    keyset_field = 'purchase_date'
     
     def get_queryset(self):
-        return Expense.objects.filter(user=self.request.user).order_by('-purchase_date')
+        return Expense.objects.filter(user=self.request.user).only('description', 'total_amount', 'purchase_date')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Despesas Variáveis Registradas'
-        context['expenses'] = self.get_queryset() 
         return context
     
+class ImportExpensesView(LoginRequiredMixin, FormView):
+    form_class = ImportExpensesForm
+    template_name = 'expenses/import_expenses.html'
+
+    def form_valid(self, form):
+        stream = io.TextIOWrapper(form.cleaned_data['file'].file, encoding=form.cleaned_data['encoding'], errors='replace', newline='')
+        result = import_expenses(
+            stream, self.request.user, form.cleaned_data['file_format'], expense_sign=form.cleaned_data['expense_sign']
+        )
+        return self.render_to_response(self.get_context_data(form=self.form_class(), result=result))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Importar Extrato Bancário'
+        return context
+
+class ExportView(LoginRequiredMixin, View):
+    template_name = 'expenses/export.html'
+
+    def get(self, request, *args, **kwargs):
+        form = ExportForm(request.GET or None)
+        if not form.is_valid():
+            return render(request, self.template_name, {'form': form, 'title': 'Exportar Histórico'})
+
+        data = form.cleaned_data
+        sheet_name, headers, rows = EXPORTS[data['dataset']]
+        rows = rows(request.user, data['start'], data['end'])
+        # Sob ASGI o corpo precisa ser um iterador assíncrono para sair aos poucos.
+        stream = areporting_stream if isinstance(request, ASGIRequest) else reporting_stream
+        if data['file_format'] == 'xlsx':
+            response = StreamingHttpResponse(
+                stream(request.user.pk, stream_xlsx(sheet_name, headers, rows)),
+                content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            )
+        else:
+            response = StreamingHttpResponse(stream(request.user.pk, stream_csv(headers, rows)), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{sheet_name}.{data["file_format"]}"'
+        return response
+
 class EditExpenseView(LoginRequiredMixin, UpdateView):
     model = Expense
     form_class = ExpenseForm
     template_name = 'expenses/add_expense.html'
     
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
     def get_success_url(self):
         purchase_date = self.object.purchase_date
         return reverse('monthly_balance') + f'?month={purchase_date.month}&year={purchase_date.year}'
@@ -195,49 +317,83 @@ class AddFixedExpenseView(LoginRequiredMixin, CreateView):
     template_name = 'expenses/add_or_edit_fixed_expense.html'
     success_url = reverse_lazy('fixed_expense_list')
 
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
     def form_valid(self, form):
         form.instance.user = self.request.user
         return super().form_valid(form)
          
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['title'] = 'Adicionar Gasto Fixo Mensal (por 12 meses)'
+        context['title'] = 'Adicionar Gasto Fixo Mensal'
         return context
 
-class FixedExpenseListView(LoginRequiredMixin, ListView):
+class FixedExpenseListView(AsyncLoginRequiredMixin, KeysetPaginationMixin, ListView):
     model = FixedExpense
     template_name = 'expenses/fixed_expense_list.html'
     context_object_name = 'fixed_expenses'
-    ordering = ['-start_date']
-    
+    keyset_field = 'start_date'
     
     def get_queryset(self):
-        return FixedExpense.objects.filter(user=self.request.user).order_by('-start_date')
+        return FixedExpense.objects.filter(user=self.request.user).only('description', 'monthly_amount', 'start_date', 'end_date')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Gastos Fixos Mensais Registrados'
-        expenses_with_end_date = []
-        for expense in context['fixed_expenses']:
-            end_date = expense.start_date + relativedelta(months=11)
-            expenses_with_end_date.append({'expense': expense, 'end_date': end_date})
-        context['expenses_with_end_date'] = expenses_with_end_date
         return context
 
 class EditFixedExpenseView(LoginRequiredMixin, UpdateView):
     model = FixedExpense
-    form_class = FixedExpenseForm
+    form_class = EditFixedExpenseForm
     template_name = 'expenses/add_or_edit_fixed_expense.html'
     success_url = reverse_lazy('fixed_expense_list')
     
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
     def get_queryset(self):
         return FixedExpense.objects.filter(user=self.request.user).order_by('-start_date')
 
+    def form_valid(self, form):
+        if form.cleaned_data['scope'] == 'forward':
+            self.object = form.instance.save_from(timezone.now().date())
+            return redirect(self.get_success_url())
+        return super().form_valid(form)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = f'Editar Gasto Fixo: {self.object.description}'
         return context
 
+class EditFixedExpenseOccurrenceView(LoginRequiredMixin, UpdateView):
+    model = FixedExpenseOccurrence
+    form_class = FixedExpenseOccurrenceForm
+    template_name = 'expenses/add_or_edit_fixed_expense.html'
+
+    def get_object(self, queryset=None):
+        fixed_expense = get_object_or_404(FixedExpense, pk=self.kwargs['pk'], user=self.request.user)
+        year, month = self.kwargs['year'], self.kwargs['month']
+        try:
+            month_bounds(year, month)
+        except (ValueError, OverflowError):
+            raise Http404
+        if not fixed_expense.covers(year, month):
+            raise Http404
+        return fixed_expense.occurrence_for(year, month)
+
+    def get_success_url(self):
+        return reverse('monthly_balance') + f'?month={self.object.month}&year={self.object.year}'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = f'Ajustar {self.object.fixed_expense.description} em {self.object.month:02d}/{self.object.year}'
+        return context
+
 class DeleteFixedExpenseView(LoginRequiredMixin, DeleteView):
     model = FixedExpense
     template_name = 'expenses/confirm_delete_fixed_expense.html'
@@ -252,91 +408,331 @@ class DeleteFixedExpenseView(LoginRequiredMixin, DeleteView):
         context['title'] = f'Confirmar Exclusão: {self.object.description}'
         return context
 
-class MonthlyBalanceView(LoginRequiredMixin, TemplateView):
-    template_name = 'expenses/monthly_balance.html'
+class CategoryListView(LoginRequiredMixin, ListView):
+    model = Category
+    template_name = 'expenses/category_list.html'
+    context_object_name = 'categories'
+
+    def get_queryset(self):
+        return Category.objects.filter(user=self.request.user)
 
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return redirect('login') 
-        return super().dispatch(request, *args, **kwargs)
-    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        today = timezone.now().date()
-        current_month = self.request.GET.get('month', today.month)
-        current_year = self.request.GET.get('year', today.year)
+        context['title'] = 'Categorias'
+        return context
 
-        try:
-            current_month = int(current_month)
-            current_year = int(current_year)
-            if not 1 <= current_month <= 12:
-                current_month = today.month
-        except (ValueError, TypeError):
-            current_month = today.month
-            current_year = today.year
+class AddCategoryView(LoginRequiredMixin, CreateView):
+    model = Category
+    form_class = CategoryForm
+    template_name = 'expenses/add_or_edit_category.html'
+    success_url = reverse_lazy('category_list')
 
-        try:
-            salary_obj = Salary.objects.get(user=self.request.user, year=current_year)
-            salary_amount = salary_obj.amount
-        except Salary.DoesNotExist:
-            salary_amount = Decimal('0.00')
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
 
-        
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        return super().form_valid(form)
 
-        expenses_this_month = Expense.objects.filter(
-            user=self.request.user,
-            is_installment=False,
-            purchase_date__month=current_month,
-            purchase_date__year=current_year
-        ).values('description', 'total_amount', 'purchase_date')
-        total_expenses_direct = expenses_this_month.aggregate(total=Sum('total_amount'))['total'] or Decimal('0.00')
-
-        installments_this_month = Installment.objects.filter(
-            user=self.request.user,
-            month=current_month, 
-            year=current_year
-        )
-        sum_installments = installments_this_month.aggregate(total=Sum('installment_amount'))['total'] or Decimal('0.00')
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = 'Adicionar Categoria'
+        return context
 
+class EditCategoryView(LoginRequiredMixin, UpdateView):
+    model = Category
+    form_class = CategoryForm
+    template_name = 'expenses/add_or_edit_category.html'
+    success_url = reverse_lazy('category_list')
 
-        total_installments = total_expenses_direct + sum_installments
-        
-        fixed_expenses_this_month = FixedExpenseOccurrence.objects.filter(
-            user=self.request.user,
-            month=current_month,
-            year=current_year
-        )
-        total_fixed_expenses = fixed_expenses_this_month.aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
 
-        total_expenses = total_installments + total_fixed_expenses
-        balance = salary_amount - total_expenses
+    def get_queryset(self):
+        return Category.objects.filter(user=self.request.user)
 
-        locale.setlocale(locale.LC_TIME, 'Portuguese_Brazil.1252')
-        try:
-            month_name = calendar.month_name[current_month].capitalize()
-        except IndexError:
-            month_name = "Mês Inválido"
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = f'Editar Categoria: {self.object.name}'
+        return context
+
+class DeleteCategoryView(LoginRequiredMixin, DeleteView):
+    model = Category
+    template_name = 'expenses/confirm_delete_category.html'
+    success_url = reverse_lazy('category_list')
+    context_object_name = 'category'
+
+    def get_queryset(self):
+        return Category.objects.filter(user=self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = f'Confirmar Exclusão: {self.object.name}'
+        return context
+
+def parse_period(params, today):
+    try:
+        month = int(params.get('month', today.month))
+        year = int(params.get('year', today.year))
+        if not 1 <= month <= 12:
+            month = today.month
+        # Anos fora de 1..9999 (e dezembro de 9999, cujo mês seguinte não existe) não cabem em um date.
+        month_bounds(year, month)
+    except (ValueError, TypeError, OverflowError):
+        return today.year, today.month
+    return year, month
+
+class MonthlyBalanceView(AsyncLoginRequiredMixin, TemplateView):
+    template_name = 'expenses/monthly_balance.html'
+
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        with reporting_reads(request.user.pk):
+            context.update(await aget_monthly_balance(request.user.pk, context['current_year'], context['current_month']))
+        return self.render_to_response(context)
     
-        context['title'] = f'Saldo Mensal - {month_name}/{current_year}'
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = timezone.now().date()
+        current_year, current_month = parse_period(self.request.GET, today)
+
+        context['title'] = f'Saldo Mensal - {month_name(current_month)}/{current_year}'
         context['current_month'] = current_month
         context['current_year'] = current_year
-        context['salary'] = salary_amount
-        context['total_installments'] = total_installments
-        context['total_fixed_expenses'] = total_fixed_expenses
-        context['total_expenses'] = total_expenses
-        context['balance'] = balance 
-        context['installments'] = installments_this_month
-        context['fixed_expenses_occurrences'] = fixed_expenses_this_month
-        context['month_name'] = month_name
+        context['month_name'] = month_name(current_month)
 
         context['months'] = list(range(1, 13))
         context['years'] = list(range(today.year - 5, today.year + 6))
         
         context['usuario'] = self.request.user.username
-        
-        
-        
 
         return context
 
 
+
+
+def parse_overview_range(params, today):
+    try:
+        months = min(max(int(params.get('months', 12)), 1), 240)
+    except ValueError:
+        months = 12
+    try:
+        if 'year' in params:
+            first_month, months = date(int(params['year']), 1, 1), 12
+        else:
+            year, month = params['start'].split('-')
+            first_month = date(int(year), int(month), 1)
+        # O fim (exclusivo) do período também precisa caber em um date.
+        first_month + relativedelta(months=months)
+    except (KeyError, ValueError, OverflowError):
+        return date(today.year, 1, 1), 12
+    return first_month, months
+
+class AnnualOverviewView(AsyncLoginRequiredMixin, TemplateView):
+    template_name = 'expenses/annual_overview.html'
+
+    async def get(self, request, *args, **kwargs):
+        self.first_month, self.months = parse_overview_range(request.GET, timezone.now().date())
+        with reporting_reads(request.user.pk):
+            self.overview = await aget_overview(request.user.pk, self.first_month, self.months)
+        return self.render_to_response(self.get_context_data(**kwargs))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        today = timezone.now().date()
+        first_month, months, overview = self.first_month, self.months, self.overview
+
+        context['title'] = f'Visão Anual - {first_month.year}' if months == 12 and first_month.month == 1 else 'Visão por Período'
+        context['overview'] = overview
+        context['current_year'] = first_month.year
+        context['years'] = list(range(today.year - 5, today.year + 6))
+        for field in ('salary', 'variable_total', 'installment_total', 'fixed_total', 'total_expenses', 'balance'):
+            context[f'sum_{field}'] = sum((row[field] for row in overview), Decimal('0.00'))
+        return context
+
+class OverviewApiView(AsyncLoginRequiredMixin, View):
+    raise_exception = True
+
+    async def get(self, request, *args, **kwargs):
+        first_month, months = parse_overview_range(request.GET, timezone.now().date())
+        with reporting_reads(request.user.pk):
+            overview = await aget_overview(request.user.pk, first_month, months)
+        return JsonResponse({
+            'start': f'{first_month.year}-{first_month.month:02d}',
+            'months': months,
+            'overview': overview,
+        })
+
+class BalanceApiView(AsyncLoginRequiredMixin, View):
+    raise_exception = True
+
+    async def get(self, request, *args, **kwargs):
+        year, month = parse_period(request.GET, timezone.now().date())
+        # A versão do usuário muda a cada gravação; se ela não mudou, os totais também não.
+        etag = f'"{await auser_version(request.user.pk)}-{year}-{month:02d}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            with reporting_reads(request.user.pk):
+                balance = await aget_monthly_balance(request.user.pk, year, month)
+            response = JsonResponse({
+                'year': year,
+                'month': month,
+                'month_name': month_name(month),
+                'salary': balance['salary'],
+                'total_installments': balance['total_installments'],
+                'total_fixed_expenses': balance['total_fixed_expenses'],
+                'total_expenses': balance['total_expenses'],
+                'balance': balance['balance'],
+                'installments': [
+                    {'expense': row['ref'], 'description': row['label'], 'value': row['value'], 'date': row['day']}
+                    for row in balance['installments']
+                ],
+                'fixed_expenses': [
+                    {'fixed_expense': row['ref'], 'description': row['label'], 'value': row['value'], 'date': row['day']}
+                    for row in balance['fixed_expenses_occurrences']
+                ],
+                'categories': balance['categories'],
+            })
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+class CategoryApiView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        # ?year=&month= para um mês; só ?year= (ou ?start=AAAA-MM&months=) para um período.
+        today = timezone.now().date()
+        if 'month' in request.GET:
+            year, month = parse_period(request.GET, today)
+            first_month, months = date(year, month, 1), 1
+        else:
+            first_month, months = parse_overview_range(request.GET, today)
+        with reporting_reads(request.user.pk):
+            breakdown = get_category_breakdown(request.user.pk, first_month, months)
+        return JsonResponse({
+            'start': f'{first_month.year}-{first_month.month:02d}',
+            'months': months,
+            **breakdown,
+        })
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BatchApiView(LoginRequiredMixin, View):
+    # Sem CSRF: só aceita application/json, que um formulário de outro site não consegue enviar.
+    raise_exception = True
+
+    def post(self, request, *args, **kwargs):
+        if request.content_type != 'application/json':
+            return JsonResponse({'error': 'Envie o lote como application/json.'}, status=415)
+        try:
+            payload = json.loads(request.body)
+            results = apply_batch(request.user, payload.get('items') if isinstance(payload, dict) else None)
+        except (ValueError, BatchError) as error:
+            message = str(error) if isinstance(error, BatchError) else 'JSON inválido.'
+            return JsonResponse({'error': message}, status=400)
+        except IntegrityError:
+            # Outro envio do mesmo lote gravou as chaves ao mesmo tempo; repetir devolve os duplicados.
+            return JsonResponse({'error': 'Conflito ao gravar o lote; envie novamente.'}, status=409)
+
+        summary = {status: 0 for status in ('created', 'duplicate', 'invalid')}
+        for result in results:
+            summary[result['status']] += 1
+        return JsonResponse({'summary': summary, 'results': results})
+
+class SyncApiView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            cursor = decode_cursor(request.GET['since']) if request.GET.get('since') else None
+            limit = min(max(int(request.GET.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        except (InvalidCursor, ValueError):
+            return JsonResponse({'error': 'Parâmetros inválidos.'}, status=400)
+        return JsonResponse(changes_since(request.user.pk, cursor, limit))
+
+class SearchApiView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+            end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+            limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            return JsonResponse({'error': 'Parâmetros inválidos.'}, status=400)
+        text = request.GET.get('q', '')
+        with reporting_reads(request.user.pk):
+            results = search_descriptions(request.user.pk, text, start, end, limit)
+        return JsonResponse({'q': text, 'results': results})
+
+class ForecastApiView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            months = min(max(int(request.GET.get('months', 12)), 1), 120)
+            initial = float(request.GET.get('initial', 0))
+            purchases = [
+                (float(total), int(count))
+                for total, count in (p.split(':') for p in request.GET.getlist('purchase'))
+            ]
+        except ValueError:
+            return JsonResponse({'error': 'Parâmetros inválidos.'}, status=400)
+        if len(purchases) > MAX_SCENARIOS:
+            return JsonResponse({'error': f'No máximo {MAX_SCENARIOS} compras por simulação.'}, status=400)
+        # float() aceita "nan" e "inf", que nem cabem no JSON da resposta.
+        if not math.isfinite(initial) or any(
+            not math.isfinite(total) or total < 0 or not 1 <= count <= MAX_INSTALLMENTS for total, count in purchases
+        ):
+            return JsonResponse({'error': 'Parâmetros inválidos.'}, status=400)
+
+        forecast = CashFlowForecast.for_user(request.user.pk, timezone.now().date(), months)
+        savings = forecast.cumulative_savings(initial)
+        data = {
+            'start': f'{forecast.start.year}-{forecast.start.month:02d}',
+            'months': [
+                {'salary': round(s, 2), 'committed': round(c, 2), 'balance': round(s - c, 2), 'savings': round(total, 2)}
+                for s, c, total in zip(forecast.salary.tolist(), forecast.committed.tolist(), savings.tolist())
+            ],
+        }
+        if purchases:
+            totals, counts = zip(*purchases)
+            scenario_savings = forecast.scenario_savings(totals, counts, initial=initial)
+            data['scenarios'] = [
+                {'total': total, 'installments': count, 'affordable': bool(lowest >= 0), 'lowest_savings': round(lowest, 2)}
+                for total, count, lowest in zip(totals, counts, scenario_savings.min(axis=1).tolist())
+            ]
+        return JsonResponse(data)
+
+class ChartView(LoginRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request, kind, *args, **kwargs):
+        file_format = request.GET.get('format', 'png')
+        if kind not in CHART_TYPES or file_format not in FORMATS:
+            raise Http404
+        today = timezone.now().date()
+        try:
+            year = int(request.GET.get('year', today.year))
+            month = int(request.GET.get('month', today.month))
+            if not 1 <= month <= 12:
+                raise ValueError
+            # O período do gráfico (o mês, ou o ano todo na evolução) precisa caber em um date.
+            month_bounds(year, month if kind == 'breakdown' else 12)
+        except (ValueError, OverflowError):
+            raise Http404
+
+        try:
+            with reporting_reads(request.user.pk):
+                path = get_chart(request.user.pk, kind, year, month if kind == 'breakdown' else None, file_format)
+        except ChartTimeout:
+            response = HttpResponse('Gráfico em preparo; tente novamente em instantes.', status=503, content_type='text/plain; charset=utf-8')
+            response['Retry-After'] = '5'
+            return response
+        response = FileResponse(open(path, 'rb'), content_type=FORMATS[file_format])
+        response['Cache-Control'] = 'private, max-age=60'
+        return response
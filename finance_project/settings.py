@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    'expenses.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,13 +63,63 @@ WSGI_APPLICATION = 'finance_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Perfil de produção do SQLite: WAL permite leituras durante uma escrita, BEGIN IMMEDIATE
+# faz escritas concorrentes esperarem o lock (timeout) em vez de falharem com "database is locked",
+# e as conexões são reaproveitadas entre requisições (os PRAGMAs rodam só ao conectar).
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL;'
+    'PRAGMA synchronous=NORMAL;'
+    'PRAGMA mmap_size=134217728;'  # 128 MB
+    'PRAGMA cache_size=-20000;'    # ~20 MB por conexão
+    'PRAGMA temp_store=MEMORY;'
+)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': SQLITE_PRAGMAS,
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,  # busy timeout, em segundos
+        },
+    },
+    # Cópia somente leitura para relatórios (saldo, visão anual, exportações), atualizada com
+    # `manage.py refresh_replica --every 60`. Enquanto não existir, tudo é lido do principal.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': 'PRAGMA query_only=ON;PRAGMA mmap_size=134217728;PRAGMA cache_size=-20000',
+            'timeout': 20,
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+DATABASE_ROUTERS = ['expenses.routers.ReportingRouter']
+
+
+# Cache
+# O saldo mensal fica em cache por usuário/mês e é invalidado pela versão dos dados do usuário,
+# lida do banco (expenses/cache.py).
+# Para compartilhar entre processos, use 'django.core.cache.backends.filebased.FileBasedCache'
+# com LOCATION apontando para um diretório, ex.: BASE_DIR / 'cache'.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'finance',
     }
 }
 
+FINANCE_CACHE_TIMEOUT = 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -115,6 +166,27 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'  # URL base para acessar arquivos de mídia
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')  # Diretório físico onde os arquivos serão salvos
 
+# Gráficos: renderizados em processos separados e guardados em MEDIA_ROOT/charts
+CHART_WORKERS = 2
+CHART_RENDER_TIMEOUT = 30  # segundos
+
+# Instrumentação por requisição: cabeçalho Server-Timing e linhas no log 'expenses.timing'.
+# Requisições acima de SERVER_TIMING_SLOW_MS registram a lista completa de consultas (WARNING);
+# as demais saem em INFO, que o console só mostra com o nível do logger abaixo em 'INFO'.
+SERVER_TIMING = True
+SERVER_TIMING_SLOW_MS = 500
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'expenses.timing': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 